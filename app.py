@@ -1,16 +1,25 @@
 # app.py - FIXED: Column mapping back to single row, removed blank spaces
-import io
 import sys
 import calendar
 import datetime as dt
 import urllib.parse
 import base64
+import copy
+import html
 from pathlib import Path
 import time
+import threading
 import random
+import re
+import functools
+import heapq
+from contextlib import contextmanager
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
 
 import pandas as pd
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from streamlit import cache_data
 
 ROOT = Path(__file__).resolve().parent
@@ -21,10 +30,10 @@ from src.schema import init_db
 from src import crud
 
 
-def _logo_data_uri(path: Path) -> str:
-    """Convert image to data URI"""
-    if not path.exists():
-        return ""
+@st.cache_resource
+def _logo_data_uri(path_str: str, mtime: float) -> str:
+    """Convert image to data URI; mtime is part of the key so a replaced file is re-encoded"""
+    path = Path(path_str)
     suffix = path.suffix.lower().lstrip(".")
     
     if suffix in {"svg"}:
@@ -47,36 +56,48 @@ def _logo_data_uri(path: Path) -> str:
     return f"data:{mime};base64,{encoded}"
 
 
+@st.cache_resource
+def _logo_bytes(path_str: str, mtime: float) -> bytes:
+    """Image bytes; mtime is part of the key so a replaced file is re-read"""
+    return Path(path_str).read_bytes()
+
+
 REQUIRED_CRUD_APIS = (
     "list_clients",
+    "get_client",
     "create_client",
     "update_client",
     "set_client_active",
+    "set_clients_active",
     "list_banks",
+    "get_bank",
     "add_bank",
     "update_bank",
-    "bank_has_transactions",
+    "banks_with_transactions",
     "set_bank_active",
+    "set_banks_active",
     "list_categories",
     "add_category",
     "update_category",
+    "update_category_full",
     "set_category_active",
     "bulk_add_categories",
-    "list_table_columns",
-    "list_tables",
+    "list_columns_by_table",
     "drafts_summary",
     "get_draft_summary",
     "get_commit_summary",
     "insert_draft_rows",
+    "bulk_insert_draft_rows",
     "process_suggestions",
     "load_draft",
-    "load_draft_rows",
-    "load_committed_rows",
+    "load_draft_df",
+    "load_committed_df",
     "save_review_changes",
     "commit_period",
     "committed_sample",
     "list_committed_periods",
     "list_committed_transactions",
+    "list_committed_transactions_df",
     "list_committed_pl_summary",
     "list_commit_metrics",
     "delete_client_data",
@@ -84,12 +105,154 @@ REQUIRED_CRUD_APIS = (
 )
 
 
+_CARD_OPEN = '<div class="professional-card">'
+_CARD_CLOSE = '</div>'
+
+
+@contextmanager
+def _card():
+    """Container wrapped in the professional-card markup"""
+    with st.container():
+        st.markdown(_CARD_OPEN, unsafe_allow_html=True)
+        yield
+        st.markdown(_CARD_CLOSE, unsafe_allow_html=True)
+
+
+_ACCOUNT_TYPES = ("Current", "Credit Card", "Savings", "Investment", "Wallet")
+_ACCOUNT_TYPE_IDX = {t: i for i, t in enumerate(_ACCOUNT_TYPES)}
+_MONTH_NAMES = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+_MONTH_TO_IDX = {name: i + 1 for i, name in enumerate(_MONTH_NAMES)}
+_NAV_ITEMS = (
+    ("🏠 Home", "Home"),
+    ("📊 Reports", "Reports"),
+    ("📈 Dashboard", "Dashboard"),
+    ("🧠 Categorisation", "Categorisation"),
+    ("🏢 Companies", "Companies"),
+    ("⚙️ Settings", "Settings"),
+)
+_COMPANIES_SUBPAGES = ("List", "Create", "Edit")
+_SETUP_SUBPAGES = (("Banks", "🏦 Banks"), ("Categories", "🗂️ Categories"))
+_DRAFT_BATCH_SIZE = 10_000
+_PREVIEW_ROWS = 1000
+_REVIEW_PAGE_ROWS = 200
+# Column order and dtypes of the mapped statement; tx_date holds datetime.date objects
+_STANDARDIZED_COLUMNS = ["tx_date", "description", "debit", "credit", "balance"]
+_STANDARDIZED_DTYPES = {"debit": "float64", "credit": "float64", "balance": "float64"}
+
+
 def _format_exc(exc: Exception) -> str:
     return f"{exc.__class__.__name__}: {exc}"
 
 
+_STATEMENT_DATE_FORMATS = (
+    "%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d", "%Y/%m/%d", "%d %b %Y", "%d %B %Y",
+    "%d/%m/%y", "%d-%m-%y", "%d-%b-%Y", "%d-%b-%y", "%d %b %y",
+)
+# ISO first, so cells the sniffed format missed are never read day-first by mistake
+_DATE_FALLBACK_FORMATS = ("%Y-%m-%d", "%Y/%m/%d") + tuple(
+    fmt for fmt in _STATEMENT_DATE_FORMATS if not fmt.startswith("%Y")
+)
+# Non-empty cells sampled to pick one explicit format for the whole column
+_DATE_SNIFF_ROWS = 20
+
+
+@functools.lru_cache(maxsize=256)
+def _detect_date_format(samples: tuple[str, ...]) -> str | None:
+    """Statement date format that parses most of the samples (the first listed wins a tie), or None"""
+    best, best_hits = None, len(samples) // 2
+    for fmt in _STATEMENT_DATE_FORMATS:
+        hits = 0
+        for sample in samples:
+            try:
+                dt.datetime.strptime(sample, fmt)
+                hits += 1
+            except ValueError:
+                pass
+        if hits > best_hits:
+            best, best_hits = fmt, hits
+    return best
+
+
+def _parse_statement_dates(series: pd.Series) -> pd.Series:
+    """Parse a statement date column to datetime.date, NaT where unparseable"""
+    text = series.astype(str).str.strip()
+    filled = series.notna() & text.ne("")
+    samples = tuple(text[filled].head(_DATE_SNIFF_ROWS))
+    fmt = _detect_date_format(samples) if samples else None
+    parsed = pd.Series(pd.NaT, index=series.index, dtype="datetime64[ns]")
+    # Sniffed format first, then each explicit format on the cells still missing, then pandas inference
+    for attempt in ((fmt,) if fmt else ()) + _DATE_FALLBACK_FORMATS:
+        retry = parsed.isna() & filled
+        if not retry.any():
+            return parsed.dt.date
+        parsed[retry] = pd.to_datetime(text[retry], format=attempt, errors="coerce")
+    retry = parsed.isna() & filled
+    if retry.any():
+        parsed[retry] = pd.to_datetime(text[retry], format="mixed", dayfirst=True, errors="coerce")
+    return parsed.dt.date
+
+
+_AMOUNT_NOISE_RE = re.compile(r"[,\s]")
+_AMOUNT_CRDR_RE = re.compile(r"(cr|dr)$", re.IGNORECASE)
+
+
+def _parse_statement_amounts(series: pd.Series) -> pd.Series:
+    """Parse a statement amount column, tolerating thousands separators and Cr/Dr suffixes"""
+    text = series.astype(str).str.replace(_AMOUNT_NOISE_RE, "", regex=True).str.replace(_AMOUNT_CRDR_RE, "", regex=True)
+    return pd.to_numeric(text, errors="coerce")
+
+
+def _standardize_statement(
+    df_raw: pd.DataFrame, mapping: tuple[str, str, str, str, str], period_start: dt.date
+) -> tuple[pd.DataFrame, int, int]:
+    """Map (date, description, debit, credit, balance) columns to the draft layout in one vectorized pass.
+    
+    Returns the frame plus the counts of rows dropped for a missing description
+    and rows whose missing date fell back to period_start.
+    """
+    map_date, map_desc, map_dr, map_cr, map_bal = mapping
+    index = df_raw.index
+    
+    def mapped_amount(col):
+        if col == "(blank)":
+            return pd.Series(0.0, index=index)
+        return _parse_statement_amounts(df_raw[col]).fillna(0.0).round(2)
+    
+    if map_date != "(blank)":
+        tx_date = _parse_statement_dates(df_raw[map_date])
+    else:
+        tx_date = pd.Series(None, index=index, dtype=object)
+    if map_desc != "(blank)":
+        description = df_raw[map_desc].fillna("").astype(str).str.strip()
+    else:
+        description = pd.Series("", index=index)
+    if map_bal != "(blank)":
+        balance = _parse_statement_amounts(df_raw[map_bal])
+    else:
+        balance = pd.Series(float("nan"), index=index)
+    
+    # Rows without a description are dropped; missing dates fall back to the period start
+    desc_missing = description.eq("")
+    date_missing = tx_date.isna()
+    
+    std = pd.DataFrame({
+        "tx_date": tx_date.where(~date_missing, period_start),
+        "description": description,
+        "debit": mapped_amount(map_dr),
+        "credit": mapped_amount(map_cr),
+        "balance": balance,
+    }, columns=_STANDARDIZED_COLUMNS).astype(_STANDARDIZED_DTYPES)[~desc_missing]
+    return std.reset_index(drop=True), int(desc_missing.sum()), int((date_missing & ~desc_missing).sum())
+
+
+@st.cache_resource
+def _missing_crud_apis() -> tuple[str, ...]:
+    """Required crud helpers absent from the loaded module; checked once per process"""
+    return tuple(sorted(set(REQUIRED_CRUD_APIS).difference(dir(crud))))
+
+
 def _validate_crud() -> None:
-    missing = [name for name in REQUIRED_CRUD_APIS if not hasattr(crud, name)]
+    missing = _missing_crud_apis()
     if missing:
         st.error(
             "The app could not load required database helpers. "
@@ -103,62 +266,331 @@ _validate_crud()
 
 
 # ---------------- Cached Masters ----------------
-@st.cache_data(ttl=30)
+# Writes invalidate their own caches, so the TTL only bounds staleness from other sessions.
+_CACHE_TTL = 300
+# Master data (clients, banks, categories); kept short because crud._q reports DB errors as empty results
+_MASTER_CACHE_TTL = 60
+_CACHE_MAX_ENTRIES = 64
+
+
+@st.cache_resource
+def _cache_stats() -> dict[str, Counter]:
+    return {"loads": Counter(), "clears": Counter()}
+
+
+def _clear_caches(*cached_fns) -> None:
+    stats = _cache_stats()
+    for fn in cached_fns:
+        fn.clear()
+        stats["clears"][getattr(fn, "__name__", repr(fn))] += 1
+
+
+def _reporting(what: str, default=None):
+    """Wrap a cached loader so a failure is reported and defaulted outside the cache, never stored in it.
+    
+    The wrapper keeps .clear() for _clear_caches; .strict is the raising cached loader itself.
+    """
+    def wrap(cached_fn):
+        @functools.wraps(cached_fn)
+        def accessor(*args, **kwargs):
+            try:
+                return cached_fn(*args, **kwargs)
+            except Exception as e:
+                st.error(f"Unable to load {what}. {_format_exc(e)}")
+                return copy.deepcopy(default)
+        
+        accessor.clear = cached_fn.clear
+        accessor.strict = cached_fn
+        return accessor
+    
+    return wrap
+
+
+@_reporting("clients", [])
+@st.cache_data(ttl=_MASTER_CACHE_TTL, max_entries=_CACHE_MAX_ENTRIES, show_spinner=False)
 def cached_clients():
-    try:
-        return crud.list_clients(include_inactive=True)
-    except Exception as e:
-        st.error(f"Unable to load clients. {_format_exc(e)}")
-        return []
+    _cache_stats()["loads"]["cached_clients"] += 1
+    return crud.list_clients(include_inactive=True)
+
 
+@_reporting("company")
+@st.cache_data(ttl=_MASTER_CACHE_TTL, max_entries=_CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_client(client_id: int):
+    _cache_stats()["loads"]["cached_client"] += 1
+    return crud.get_client(client_id)
 
-@st.cache_data(ttl=30)
+
+@_reporting("banks", [])
+@st.cache_data(ttl=_MASTER_CACHE_TTL, max_entries=_CACHE_MAX_ENTRIES, show_spinner=False)
 def cached_banks(client_id: int):
-    try:
-        return crud.list_banks(client_id, include_inactive=True)
-    except Exception as e:
-        st.error(f"Unable to load banks. {_format_exc(e)}")
-        return []
+    _cache_stats()["loads"]["cached_banks"] += 1
+    return crud.list_banks(client_id, include_inactive=True)
+
+
+@_reporting("bank names", {})
+@st.cache_data(ttl=_MASTER_CACHE_TTL, max_entries=_CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_bank_names(client_id: int) -> dict[int, str]:
+    """{bank id: bank name} for every bank of the client, inactive included"""
+    _cache_stats()["loads"]["cached_bank_names"] += 1
+    return {int(b["id"]): b["bank_name"] for b in cached_banks.strict(client_id)}
+
 
+@_reporting("active banks", {})
+@st.cache_data(ttl=_MASTER_CACHE_TTL, max_entries=_CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_active_banks_by_id(client_id: int) -> dict[int, dict]:
+    _cache_stats()["loads"]["cached_active_banks_by_id"] += 1
+    return {int(b["id"]): b for b in crud.list_banks(client_id, include_inactive=False)}
 
-@st.cache_data(ttl=30)
+
+@_reporting("bank")
+@st.cache_data(ttl=_MASTER_CACHE_TTL, max_entries=_CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_bank(bank_id: int):
+    _cache_stats()["loads"]["cached_bank"] += 1
+    return crud.get_bank(bank_id)
+
+
+@_reporting("categories", [])
+@st.cache_data(ttl=_MASTER_CACHE_TTL, max_entries=_CACHE_MAX_ENTRIES, show_spinner=False)
 def cached_categories(client_id: int):
+    _cache_stats()["loads"]["cached_categories"] += 1
+    crud.ensure_ask_client_category(client_id)
+    return crud.list_categories(client_id, include_inactive=True)
+
+
+@_reporting("categories", {})
+@st.cache_data(ttl=_MASTER_CACHE_TTL, max_entries=_CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_categories_by_id(client_id: int) -> dict[int, dict]:
+    _cache_stats()["loads"]["cached_categories_by_id"] += 1
+    return {c["id"]: c for c in cached_categories.strict(client_id)}
+
+
+@_reporting("categories", {"Income": [], "Expense": [], "Other": []})
+@st.cache_data(ttl=_MASTER_CACHE_TTL, max_entries=_CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_categories_by_type(client_id: int):
+    _cache_stats()["loads"]["cached_categories_by_type"] += 1
+    by_type = {"Income": [], "Expense": [], "Other": []}
+    for c in cached_categories.strict(client_id):
+        if c.get("is_active", True):
+            by_type.setdefault(c.get("type") or "Other", []).append(c)
+    return by_type
+
+
+@_reporting("draft summary")
+@st.cache_data(ttl=_CACHE_TTL, max_entries=_CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_draft_summary(client_id: int, bank_id: int, period: str, version: int):
+    _cache_stats()["loads"]["cached_draft_summary"] += 1
+    return crud.get_draft_summary(client_id, bank_id, period)
+
+
+@st.cache_data(ttl=_CACHE_TTL, max_entries=_CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_drafts_summary(client_id: int):
+    """One entry per (bank, period) draft of the client, across all banks"""
+    _cache_stats()["loads"]["cached_drafts_summary"] += 1
+    return crud.drafts_summary(client_id, None)
+
+
+@st.cache_data(ttl=3600, max_entries=_CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_commit_metrics(client_id: int, bank_id: int, period: str, date_from, date_to):
+    """Latest commit for the period, or None"""
+    _cache_stats()["loads"]["cached_commit_metrics"] += 1
+    rows = crud.list_commit_metrics(
+        client_id=client_id, bank_id=bank_id, period=period, date_from=date_from, date_to=date_to, limit=1
+    )
+    return rows[0] if rows else None
+
+
+@st.cache_data(ttl=_CACHE_TTL, max_entries=_CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_draft_df(client_id: int, bank_id: int, period: str, version: int) -> pd.DataFrame:
+    _cache_stats()["loads"]["cached_draft_df"] += 1
+    return crud.load_draft_df(client_id, bank_id, period)
+
+
+@_reporting("commit summary")
+@st.cache_data(ttl=_CACHE_TTL, max_entries=_CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_commit_summary(client_id: int, bank_id: int, period: str, version: int):
+    _cache_stats()["loads"]["cached_commit_summary"] += 1
+    return crud.get_commit_summary(client_id, bank_id, period)
+
+
+@st.cache_data(ttl=_CACHE_TTL, max_entries=_CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_committed_df(client_id: int, bank_id: int, period: str, version: int) -> pd.DataFrame:
+    _cache_stats()["loads"]["cached_committed_df"] += 1
+    return crud.load_committed_df(client_id, bank_id, period)
+
+
+@st.cache_data(ttl=_CACHE_TTL, max_entries=_CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_committed_tx_df(client_id: int, date_from, date_to) -> pd.DataFrame:
+    _cache_stats()["loads"]["cached_committed_tx_df"] += 1
+    return crud.list_committed_transactions_df(client_id, date_from=date_from, date_to=date_to)
+
+
+_MAX_CATEGORY_OPTIONS = 200
+
+
+@st.cache_data(ttl=60, max_entries=_CACHE_MAX_ENTRIES, show_spinner=False)
+def _capped_category_options(category_names: tuple[str, ...], usage: tuple[tuple[str, int], ...]) -> list[str]:
+    """Category dropdown options, trimmed to the most used when a client has very many"""
+    if len(category_names) <= _MAX_CATEGORY_OPTIONS:
+        return list(category_names)
+    counts = dict(usage)
+    return heapq.nlargest(_MAX_CATEGORY_OPTIONS, category_names, key=lambda name: counts.get(name, 0))
+
+
+def _page_slice(df: pd.DataFrame, key: str) -> tuple[pd.DataFrame, int]:
+    """One _REVIEW_PAGE_ROWS window of df with a page picker, so only that window is sent to the browser"""
+    pages = max((len(df) - 1) // _REVIEW_PAGE_ROWS + 1, 1)
+    if pages == 1:
+        return df, 0
+    page = int(st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key=key)) - 1
+    start = page * _REVIEW_PAGE_ROWS
+    st.caption(f"Rows {start + 1}-{min(start + _REVIEW_PAGE_ROWS, len(df))} of {len(df)}; unsaved edits are kept across pages")
+    return df.iloc[start:start + _REVIEW_PAGE_ROWS], page
+
+
+def _read_statement_csv(upload) -> pd.DataFrame:
+    """Uploaded statement as text columns, read straight from the upload buffer"""
+    _cache_stats()["loads"]["_read_statement_csv"] += 1
+    # Read as text; Apply Mapping coerces dates and amounts itself
+    options = {"dtype": str, "keep_default_na": False, "na_values": [""]}
     try:
-        crud.ensure_ask_client_category(client_id)
-        return crud.list_categories(client_id, include_inactive=True)
-    except Exception as e:
-        st.error(f"Unable to load categories. {_format_exc(e)}")
-        return []
+        # pyarrow (installed with streamlit) parses multi-threaded
+        upload.seek(0)
+        return pd.read_csv(upload, engine="pyarrow", **options)
+    except Exception:
+        # Ragged or oddly quoted files the pyarrow reader rejects
+        upload.seek(0)
+        return pd.read_csv(upload, engine="c", **options)
+
+
+@st.cache_resource
+def _stmt_template_bytes() -> bytes:
+    """Statement CSV template; constant, so shared across sessions"""
+    stmt_template = pd.DataFrame([
+        {"Date": "25/09/2025", "Description": "POS Purchase Example", "Dr": 100.00, "Cr": 0.00, "Closing": ""}
+    ])
+    return stmt_template.to_csv(index=False).encode("utf-8")
+
+
+def _invalidate_clients() -> None:
+    _clear_caches(cached_clients, cached_client)
+
+
+def _client_options() -> tuple[tuple[int, str], ...]:
+    """(id, name) pairs for company selectors, from the shared clients cache"""
+    return tuple((c["id"], c["name"]) for c in cached_clients())
+
+
+def _invalidate_banks() -> None:
+    _clear_caches(cached_banks, cached_bank_names, cached_active_banks_by_id, cached_bank)
+
+
+def _invalidate_categories() -> None:
+    _clear_caches(cached_categories, cached_categories_by_id, cached_categories_by_type)
+
+
+def _invalidate_period_caches(committed: bool = False) -> None:
+    """Clear draft caches after a draft write; commit caches too when a period was committed"""
+    if committed:
+        _clear_caches(
+            cached_draft_summary, cached_draft_df, cached_drafts_summary,
+            cached_commit_summary, cached_commit_metrics, cached_committed_tx_df, cached_committed_df,
+        )
+    else:
+        _clear_caches(cached_draft_summary, cached_draft_df, cached_drafts_summary)
+    st.session_state.summary_version += 1
+    st.session_state.draft_version += 1
+
+
+def _finish_write_cycle(committed: bool = False) -> None:
+    """Drop the uploaded statement, invalidate the period caches and rerun after a save or commit"""
+    st.session_state.standardized_df = None
+    st.session_state.df_raw = None
+    _invalidate_period_caches(committed=committed)
+    st.rerun()
 
 
-def _load_schema_truth(path: Path) -> dict[str, list[str]]:
+def _unsaved_draft_edits(client_id: int, bank_id: int, period: str) -> dict[int, dict]:
+    """Review edits not yet saved, {draft row id: changed columns}; reset when the draft changes"""
+    key = (client_id, bank_id, period, st.session_state.draft_version)
+    memo = st.session_state.get("draft_unsaved_edits")
+    if memo is None or memo[0] != key:
+        # Editor states of the previous draft hold positional edits that no longer apply
+        for stale in [k for k in st.session_state if str(k).startswith("draft_editor_")]:
+            st.session_state.pop(stale, None)
+        memo = (key, {})
+        st.session_state.draft_unsaved_edits = memo
+    return memo[1]
+
+
+def _collect_page_edits(editor_key: str, df_page: pd.DataFrame, unsaved: dict[int, dict]) -> pd.DataFrame:
+    """Fold the page editor's positional edited_rows into unsaved by row id; return the page showing them"""
+    page_ids = df_page["id"].tolist()
+    edited_rows = (st.session_state.get(editor_key) or {}).get("edited_rows", {})
+    for row_idx, changes in edited_rows.items():
+        if int(row_idx) < len(page_ids):
+            unsaved.setdefault(int(page_ids[int(row_idx)]), {}).update(
+                {col: val for col, val in changes.items() if col in ("final_category", "final_vendor")}
+            )
+    
+    if not df_page["id"].isin(list(unsaved)).any():
+        return df_page
+    df_page = df_page.copy()
+    for col in ("final_category", "final_vendor"):
+        values = {row_id: edits[col] for row_id, edits in unsaved.items() if col in edits}
+        mask = df_page["id"].isin(list(values))
+        if mask.any():
+            df_page.loc[mask, col] = df_page.loc[mask, "id"].map(values)
+    return df_page
+
+
+def _session_draft_df(client_id: int, bank_id: int, period: str) -> pd.DataFrame:
+    """Draft frame memoised in session state so unchanged reruns skip the cache_data copy"""
+    key = (client_id, bank_id, period, st.session_state.draft_version)
+    memo = st.session_state.get("draft_rows_cache")
+    if memo is None or memo[0] != key:
+        memo = (key, cached_draft_df(*key))
+        st.session_state.draft_rows_cache = memo
+    return memo[1]
+
+
+def _standardized_csv_bytes(df: pd.DataFrame) -> bytes:
+    """CSV export of the mapped statement, serialized once per mapping"""
+    memo = st.session_state.get("standardized_csv_memo")
+    if memo is None or memo[0] is not df:
+        memo = (df, df.to_csv(index=False).encode("utf-8"))
+        st.session_state.standardized_csv_memo = memo
+    return memo[1]
+
+
+# "## table" heading followed by its "- column" bullets (blank lines allowed)
+_SCHEMA_TABLE_RE = re.compile(r"^## (.+)\n?((?:[ \t]*(?:- .*)?\n?)*)", re.MULTILINE)
+
+
+@st.cache_resource
+def _load_schema_truth(path_str: str, mtime: float) -> dict[str, list[str]]:
+    """Parsed schema truth file; mtime is part of the key so edits reparse"""
     truth: dict[str, list[str]] = {}
-    current_table: str | None = None
-    for line in path.read_text().splitlines():
-        if line.startswith("## "):
-            current_table = line.replace("## ", "").strip()
-            truth[current_table] = []
-            continue
-        if current_table and line.strip().startswith("- "):
-            col = line.strip()[2:].strip()
-            if col:
-                truth[current_table].append(col)
+    for table, items in _SCHEMA_TABLE_RE.findall(Path(path_str).read_text()):
+        cols = (line.strip()[2:].strip() for line in items.splitlines() if line.strip())
+        truth[table.strip()] = [col for col in cols if col]
     return truth
 
 
+@st.cache_data(ttl=_CACHE_TTL, max_entries=_CACHE_MAX_ENTRIES, show_spinner=False)
 def _run_schema_check() -> dict[str, object]:
     truth_path = Path("docs/DB_SCHEMA_TRUTH.md")
     if not truth_path.exists():
         return {"error": "docs/DB_SCHEMA_TRUTH.md not found. Please add schema truth file."}
-    truth = _load_schema_truth(truth_path)
+    truth = _load_schema_truth(str(truth_path), truth_path.stat().st_mtime)
+    actual_columns = crud.list_columns_by_table()
     expected_tables = set(truth.keys())
-    actual_tables = set(crud.list_tables())
+    actual_tables = set(actual_columns)
     tables = sorted(expected_tables | actual_tables)
     allowed_extra = {"updated_at"}
     results = []
     for table in tables:
         expected = truth.get(table, [])
-        actual = crud.list_table_columns(table) if table in actual_tables else []
+        actual = actual_columns.get(table, [])
         missing = [c for c in expected if c not in actual]
         extra = [c for c in actual if c not in expected and c not in allowed_extra]
         results.append(
@@ -191,6 +623,7 @@ def init_session_state():
         "date_from": st.session_state.get("date_from"),
         "date_to": st.session_state.get("date_to"),
         "df_raw": st.session_state.get("df_raw"),
+        "stmt_file_id": st.session_state.get("stmt_file_id"),
         "year": st.session_state.get("year", 2025),
         "month": st.session_state.get("month", "Oct"),
         "setup_banks_mode": st.session_state.get("setup_banks_mode", "list"),
@@ -198,21 +631,21 @@ def init_session_state():
         "setup_categories_mode": st.session_state.get("setup_categories_mode", "list"),
         "setup_category_edit_id": st.session_state.get("setup_category_edit_id"),
         "sidebar_companies_open": st.session_state.get("sidebar_companies_open", False),
-        "sidebar_setup_open": st.session_state.get("sidebar_setup_open", False),
         "edit_client_id": st.session_state.get("edit_client_id"),
         "edit_client_mode": st.session_state.get("edit_client_mode", False),
-        "standardized_rows": st.session_state.get("standardized_rows", []),
+        "summary_version": st.session_state.get("summary_version", 0),
+        "draft_version": st.session_state.get("draft_version", 0),
+        "pending_deactivations": st.session_state.get("pending_deactivations", set()),
+        "pending_bank_deactivations": st.session_state.get("pending_bank_deactivations", set()),
+        "standardized_df": st.session_state.get("standardized_df"),
         "column_mapping": st.session_state.get("column_mapping", {}),
         "categorisation_selected_item": st.session_state.get("categorisation_selected_item"),
         "show_edit_form": st.session_state.get("show_edit_form", False),
         "edit_row_index": st.session_state.get("edit_row_index"),
-        "app_initialized": st.session_state.get("app_initialized", False),
-        "page_transition_loader": st.session_state.get("page_transition_loader", False),
-        "loader_start_time": st.session_state.get("loader_start_time", 0),
         "processing_suggestions": st.session_state.get("processing_suggestions", False),
+        "suggest_fut": st.session_state.get("suggest_fut"),
         "processing_commit": st.session_state.get("processing_commit", False),
-        "last_edited_row": st.session_state.get("last_edited_row", None),
-        "last_edit_time": st.session_state.get("last_edit_time", 0),
+        "just_committed": st.session_state.get("just_committed"),
         "file_uploaded": st.session_state.get("file_uploaded", False),
         "ai_suggestions_animating": st.session_state.get("ai_suggestions_animating", False),
         "ai_current_row": st.session_state.get("ai_current_row", 0),
@@ -232,8 +665,8 @@ def init_session_state():
 init_session_state()
 
 # ---------------- PROFESSIONAL UI/UX STYLING - FIXED VERSION ----------------
-st.markdown(
-    """
+# Emitted on every run: Streamlit drops elements a rerun does not re-render
+_APP_CSS = """
 <style>
 /* ========== PROFESSIONAL COLOR SYSTEM ========== */
 :root {
@@ -512,6 +945,18 @@ h3 {
     background: #10b981 !important;
 }
 
+.saved-row {
+    display: flex !important;
+    align-items: center !important;
+    gap: 1.5rem !important;
+    padding: 0.75rem 0 !important;
+    border-bottom: 1px solid var(--gray-200) !important;
+}
+
+.saved-row:last-child {
+    border-bottom: none !important;
+}
+
 /* ========== PROFESSIONAL ALERTS ========== */
 .stAlert {
     border-radius: 8px !important;
@@ -717,30 +1162,19 @@ section[data-testid="stSidebar"] {
     to { opacity: 1; transform: translateY(0); }
 }
 
-/* ========== HIGHLIGHT ANIMATIONS ========== */
-@keyframes highlightRow {
-    0% { 
-        background-color: rgba(124, 255, 178, 0.4) !important;
-        box-shadow: inset 0 0 0 1px rgba(16, 185, 129, 0.3) !important;
-    }
-    70% { 
-        background-color: rgba(124, 255, 178, 0.1) !important;
-        box-shadow: inset 0 0 0 1px rgba(16, 185, 129, 0.1) !important;
-    }
-    100% { 
-        background-color: transparent !important;
-        box-shadow: none !important;
-    }
-}
+</style>
+"""
 
-.highlight-row {
-    animation: highlightRow 2s ease-out !important;
-}
 
-</style>
-""",
-    unsafe_allow_html=True,
-)
+@st.cache_resource
+def _minify_css(css: str) -> str:
+    """Drop comments and collapse whitespace so each rerun ships a one-line stylesheet"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};])\s*", r"\1", css).strip()
+
+
+st.markdown(_minify_css(_APP_CSS), unsafe_allow_html=True)
 
 # ---------------- Helper Functions ----------------
 def show_processing_message(message="Processing..."):
@@ -763,11 +1197,24 @@ def show_info_message(message="Info!"):
     """Show info message"""
     return st.info(f"ℹ️ {message}")
 
-# ---------------- App Startup ----------------
-if not st.session_state.app_initialized:
-    time.sleep(0.5)
-    st.session_state.app_initialized = True
-    st.rerun()
+def _set_flash(kind: str, message: str) -> None:
+    """Queue a message to show after the next rerun"""
+    st.session_state.flash = (kind, message)
+
+def _render_flash():
+    """Show and clear any queued flash message"""
+    flash = st.session_state.pop("flash", None)
+    if not flash:
+        return
+    kind, message = flash
+    if kind == "success":
+        show_success_message(message)
+    elif kind == "warning":
+        show_warning_message(message)
+    elif kind == "error":
+        show_error_message(message)
+    else:
+        show_info_message(message)
 
 # ---------------- Page Title ----------------
 active_page = st.session_state.active_page
@@ -779,62 +1226,67 @@ elif active_page == "Setup" and active_subpage:
     page_title = f"Setup › {active_subpage}"
 
 logo_path = ROOT / "assets" / "bankcat-logo.jpeg"
+logo_bytes = _logo_bytes(str(logo_path), logo_path.stat().st_mtime) if logo_path.exists() else None
 
-if active_page == "Home" and logo_path.exists():
+if active_page == "Home" and logo_bytes:
     st.markdown('<div class="fade-in-content">', unsafe_allow_html=True)
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        st.image(str(logo_path), width=420)
+        st.image(logo_bytes, width=420)
     st.markdown('</div>', unsafe_allow_html=True)
 else:
     st.markdown(f'<h1 class="page-title">{page_title}</h1>', unsafe_allow_html=True)
 
 # ---------------- Page Transition Handler ----------------
 def handle_page_transition(new_page: str, subpage: str | None = None):
-    if st.session_state.active_page != new_page:
-        st.session_state.active_page = new_page
-        if subpage:
-            st.session_state.active_subpage = subpage
-        st.rerun()
+    """Button on_click callback; the click's own rerun renders the new page"""
+    st.session_state.active_page = new_page
+    if subpage:
+        st.session_state.active_subpage = subpage
+
+
+def _edit_active_client():
+    st.session_state.edit_client_id = st.session_state.active_client_id
+    handle_page_transition("Companies", "Edit")
 
 # ---------------- Professional Sidebar ----------------
+@st.fragment
+def _render_sidebar_quick_actions():
+    """Quick action buttons; clicks rerun only this fragment unless a full refresh is needed"""
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("📥 Export", use_container_width=True, type="secondary"):
+            if st.session_state.active_client_id:
+                show_success_message("Export feature coming soon!")
+            else:
+                show_warning_message("Select a company first")
+    
+    with col2:
+        if st.button("🔄 Refresh", use_container_width=True, type="secondary"):
+            cache_data.clear()
+            st.session_state.draft_version += 1
+            st.rerun()
+
+
 with st.sidebar:
     # Logo
-    if logo_path.exists():
+    if logo_bytes:
         st.markdown('<div class="sidebar-logo">', unsafe_allow_html=True)
-        st.image(str(logo_path), width=160)
+        st.image(logo_bytes, width=160)
         st.markdown('</div>', unsafe_allow_html=True)
     
     st.markdown('<div class="sidebar-section">Main Navigation</div>', unsafe_allow_html=True)
     
     # Main navigation buttons
-    nav_items = [
-        {"label": "🏠 Home", "page": "Home", "icon": "🏠"},
-        {"label": "📊 Reports", "page": "Reports", "icon": "📊"},
-        {"label": "📈 Dashboard", "page": "Dashboard", "icon": "📈"},
-        {"label": "🧠 Categorisation", "page": "Categorisation", "icon": "🧠"},
-        {"label": "🏢 Companies", "page": "Companies", "icon": "🏢"},
-        {"label": "⚙️ Settings", "page": "Settings", "icon": "⚙️"},
-    ]
-    
-    for item in nav_items:
-        is_active = st.session_state.active_page == item["page"]
-        
-        # Determine button type
-        if is_active:
-            btn_type = "primary"
-        else:
-            btn_type = "secondary"
-        
-        if st.button(
-            item["label"],
+    for label, page in _NAV_ITEMS:
+        st.button(
+            label,
             use_container_width=True,
-            key=f"nav_{item['page']}",
-            type=btn_type,
-        ):
-            if item["page"] != "Companies":
-                st.session_state.sidebar_setup_open = False
-            handle_page_transition(item["page"])
+            key=f"nav_{page}",
+            type="primary" if st.session_state.active_page == page else "secondary",
+            on_click=handle_page_transition,
+            args=(page,),
+        )
     
     # Setup Section
     st.markdown('<div class="sidebar-section">Setup</div>', unsafe_allow_html=True)
@@ -842,39 +1294,29 @@ with st.sidebar:
     setup_active = st.session_state.active_page == "Setup"
     setup_subpage = st.session_state.active_subpage
     
-    if st.button(
+    st.button(
         "🏦 Banks",
         use_container_width=True,
         key="nav_banks",
         type="primary" if (setup_active and setup_subpage == "Banks") else "secondary",
-    ):
-        handle_page_transition("Setup", "Banks")
+        on_click=handle_page_transition,
+        args=("Setup", "Banks"),
+    )
     
-    if st.button(
+    st.button(
         "🗂️ Categories",
         use_container_width=True,
         key="nav_categories",
         type="primary" if (setup_active and setup_subpage == "Categories") else "secondary",
-    ):
-        handle_page_transition("Setup", "Categories")
+        on_click=handle_page_transition,
+        args=("Setup", "Categories"),
+    )
     
     st.markdown('<div class="green-divider"></div>', unsafe_allow_html=True)
     
     # Quick Actions
     st.markdown('<div class="sidebar-section">Quick Actions</div>', unsafe_allow_html=True)
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("📥 Export", use_container_width=True, type="secondary"):
-            if st.session_state.active_client_id:
-                show_success_message("Export feature coming soon!")
-            else:
-                show_warning_message("Select a company first")
-    
-    with col2:
-        if st.button("🔄 Refresh", use_container_width=True, type="secondary"):
-            cache_data.clear()
-            st.rerun()
+    _render_sidebar_quick_actions()
     
     # Footer
     st.markdown('<div class="sidebar-section"></div>', unsafe_allow_html=True)
@@ -888,36 +1330,26 @@ def _require_active_client() -> int | None:
         return None
     return client_id
 
-def _select_active_client(clients: list[dict]) -> int | None:
-    options = ["(Select a company)"] + [f"{c['id']} | {c['name']}" for c in clients]
-    selected_index = 0
-    if st.session_state.active_client_id:
-        for i, opt in enumerate(options):
-            if opt.startswith(f"{st.session_state.active_client_id} |"):
-                selected_index = i
-                break
+def _select_active_client() -> int | None:
+    client_options = _client_options()
+    names = dict(client_options)
+    options = [None] + [cid for cid, _ in client_options]
+    id_to_pos = {cid: i for i, cid in enumerate(options)}
     
-    client_pick = st.selectbox(
+    client_id = st.selectbox(
         "Select Company",
         options=options,
-        index=selected_index,
+        index=id_to_pos.get(st.session_state.active_client_id, 0),
+        format_func=lambda cid: "(Select a company)" if cid is None else f"{cid} | {names[cid]}",
         key="active_client_select",
     )
     
-    if client_pick == "(Select a company)":
-        st.session_state.active_client_id = None
-        st.session_state.active_client_name = None
-        return None
-    
-    client_id = int(client_pick.split("|")[0].strip())
     st.session_state.active_client_id = client_id
-    st.session_state.active_client_name = client_pick.split("|")[1].strip()
+    st.session_state.active_client_name = names.get(client_id)
     return client_id
 
 # ---------------- Page Render Functions ----------------
 def render_home():
-    clients = cached_clients()
-    
     st.markdown("## Welcome to BankCat AI 🏦😺")
     st.markdown('<p class="body-large">AI-powered bank statement categorization for accountants.</p>', unsafe_allow_html=True)
     
@@ -925,37 +1357,28 @@ def render_home():
     st.markdown('<div class="green-divider"></div>', unsafe_allow_html=True)
     
     # Client selector in a professional card
-    with st.container():
-        st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-        
+    with _card():
         col1, col2 = st.columns([3, 1])
         with col1:
             st.markdown("### Select Company")
             st.markdown('<p class="caption">Choose a company to manage or create a new one</p>', unsafe_allow_html=True)
         with col2:
-            if st.button("➕ New Company", type="primary", use_container_width=True):
-                handle_page_transition("Companies", "List")
-        
-        client_pick = _select_active_client(clients)
+            st.button("➕ New Company", type="primary", use_container_width=True, on_click=handle_page_transition, args=("Companies", "List"))
         
-        st.markdown('</div>', unsafe_allow_html=True)
+        _select_active_client()
     
     if st.session_state.active_client_id:
         # Metrics section
         st.markdown('<div class="green-divider"></div>', unsafe_allow_html=True)
         
-        with st.container():
-            st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-            
+        with _card():
             # Header with client name
             col1, col2 = st.columns([3, 1])
             with col1:
                 st.markdown(f"### 📋 {st.session_state.active_client_name}")
                 st.markdown('<p class="caption">Overview and quick actions</p>', unsafe_allow_html=True)
             with col2:
-                if st.button("✏️ Edit Company", type="secondary", use_container_width=True):
-                    st.session_state.edit_client_id = st.session_state.active_client_id
-                    handle_page_transition("Companies", "Edit")
+                st.button("✏️ Edit Company", type="secondary", use_container_width=True, on_click=_edit_active_client)
             
             # Quick stats in metric cards
             col1, col2, col3 = st.columns(3)
@@ -975,7 +1398,7 @@ def render_home():
                 st.markdown('</div>', unsafe_allow_html=True)
             
             try:
-                drafts = crud.drafts_summary(st.session_state.active_client_id, None)
+                drafts = cached_drafts_summary(st.session_state.active_client_id)
                 with col3:
                     st.markdown('<div class="metric-card">', unsafe_allow_html=True)
                     st.markdown(f'<div class="metric-value">{len(drafts) if drafts else 0}</div>', unsafe_allow_html=True)
@@ -995,22 +1418,15 @@ def render_home():
             action_cols = st.columns(3)
             
             with action_cols[0]:
-                if st.button("🧠 Start Categorising", use_container_width=True, type="primary"):
-                    handle_page_transition("Categorisation")
+                st.button("🧠 Start Categorising", use_container_width=True, type="primary", on_click=handle_page_transition, args=("Categorisation",))
             
             with action_cols[1]:
-                if st.button("📊 View Reports", use_container_width=True, type="secondary"):
-                    handle_page_transition("Reports")
+                st.button("📊 View Reports", use_container_width=True, type="secondary", on_click=handle_page_transition, args=("Reports",))
             
             with action_cols[2]:
-                if st.button("🏦 Manage Banks", use_container_width=True, type="secondary"):
-                    handle_page_transition("Setup", "Banks")
-            
-            st.markdown('</div>', unsafe_allow_html=True)
+                st.button("🏦 Manage Banks", use_container_width=True, type="secondary", on_click=handle_page_transition, args=("Setup", "Banks"))
     else:
-        with st.container():
-            st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-            
+        with _card():
             st.markdown("### Getting Started")
             st.markdown("""
             <div class="body">
@@ -1021,10 +1437,7 @@ def render_home():
             </div>
             """, unsafe_allow_html=True)
             
-            if st.button("🚀 Create Your First Company", type="primary", use_container_width=True):
-                handle_page_transition("Companies", "List")
-            
-            st.markdown('</div>', unsafe_allow_html=True)
+            st.button("🚀 Create Your First Company", type="primary", use_container_width=True, on_click=handle_page_transition, args=("Companies", "List"))
 
 def render_dashboard():
     st.markdown("## 📊 Financial Dashboard")
@@ -1034,9 +1447,7 @@ def render_dashboard():
     if not client_id:
         return
     
-    with st.container():
-        st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-        
+    with _card():
         col1, col2 = st.columns([1, 1])
         with col1:
             st.markdown("### Date Range")
@@ -1048,30 +1459,19 @@ def render_dashboard():
         
         if start_date > end_date:
             show_error_message("Start date must be before end date.")
-            st.markdown('</div>', unsafe_allow_html=True)
             return
-        
-        st.markdown('</div>', unsafe_allow_html=True)
     
     try:
-        transactions = crud.list_committed_transactions(
-            client_id, 
-            date_from=start_date, 
-            date_to=end_date
-        )
+        df = cached_committed_tx_df(client_id, start_date, end_date)
         
-        if transactions:
-            df = pd.DataFrame(transactions)
+        if not df.empty:
+            df[['debit', 'credit']] = df[['debit', 'credit']].fillna(0)
             
             # Income vs Expense metrics
-            with st.container():
-                st.markdown('<div class="professional-card">', unsafe_allow_html=True)
+            with _card():
                 st.markdown("### 💰 Income vs Expense")
                 st.markdown('<p class="caption">Summary of financial performance</p>', unsafe_allow_html=True)
                 
-                df['debit'] = pd.to_numeric(df['debit'], errors='coerce').fillna(0)
-                df['credit'] = pd.to_numeric(df['credit'], errors='coerce').fillna(0)
-                
                 total_income = df['credit'].sum()
                 total_expense = df['debit'].sum()
                 net = total_income - total_expense
@@ -1087,13 +1487,9 @@ def render_dashboard():
                     delta = f"{net:+,.2f}"
                     st.metric("Net Profit", f"${net:,.2f}", delta=delta,
                              delta_color="normal" if net >= 0 else "inverse")
-                
-                st.markdown('</div>', unsafe_allow_html=True)
             
             # Transactions table
-            with st.container():
-                st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-                
+            with _card():
                 col1, col2 = st.columns([3, 1])
                 with col1:
                     st.markdown("### 📋 Recent Transactions")
@@ -1102,24 +1498,17 @@ def render_dashboard():
                     if st.button("Export CSV", type="secondary", use_container_width=True):
                         show_success_message("Export feature coming soon!")
                 
-                st.dataframe(df[['tx_date', 'description', 'debit', 'credit', 'category', 'vendor']].head(20), 
+                st.dataframe(df.head(20)[['tx_date', 'description', 'debit', 'credit', 'category', 'vendor']], 
                            use_container_width=True, hide_index=True)
                 
                 if len(df) > 20:
                     st.caption(f"Showing 20 of {len(df)} transactions. Use Reports for full view.")
-                
-                st.markdown('</div>', unsafe_allow_html=True)
         else:
-            with st.container():
-                st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-                
+            with _card():
                 st.markdown("### No Data Available")
                 st.markdown('<p class="body">No committed transactions found for the selected period. Start by categorising some transactions.</p>', unsafe_allow_html=True)
                 
-                if st.button("🧠 Start Categorising", type="primary", use_container_width=True):
-                    handle_page_transition("Categorisation")
-                
-                st.markdown('</div>', unsafe_allow_html=True)
+                st.button("🧠 Start Categorising", type="primary", use_container_width=True, on_click=handle_page_transition, args=("Categorisation",))
             
     except Exception as e:
         show_error_message(f"Unable to load dashboard data: {_format_exc(e)}")
@@ -1132,9 +1521,7 @@ def render_reports():
     if not client_id:
         return
     
-    with st.container():
-        st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-        
+    with _card():
         st.markdown("### Report Configuration")
         st.markdown('<p class="caption">Select filters and report type</p>', unsafe_allow_html=True)
         
@@ -1148,9 +1535,13 @@ def render_reports():
             end_date = st.date_input("To", dt.date.today(), label_visibility="collapsed")
         with col3:
             st.markdown('<p class="label">Bank Filter</p>', unsafe_allow_html=True)
-            banks = cached_banks(client_id)
-            bank_options = ["All Banks"] + [f"{b['id']} | {b['bank_name']}" for b in banks]
-            bank_filter = st.selectbox("Bank", bank_options, label_visibility="collapsed")
+            bank_names = cached_bank_names(client_id)
+            bank_filter = st.selectbox(
+                "Bank",
+                [None] + list(bank_names),
+                format_func=lambda bid: "All Banks" if bid is None else f"{bid} | {bank_names[bid]}",
+                label_visibility="collapsed",
+            )
         
         # Report type selection
         st.markdown('<p class="label">Report Type</p>', unsafe_allow_html=True)
@@ -1171,6 +1562,7 @@ def render_reports():
                         if report_type == "P&L Summary":
                             summary = crud.list_committed_pl_summary(
                                 client_id, 
+                                bank_id=bank_filter,
                                 date_from=start_date, 
                                 date_to=end_date
                             )
@@ -1178,18 +1570,17 @@ def render_reports():
                             if summary:
                                 df_summary = pd.DataFrame(summary)
                                 
-                                with st.container():
-                                    st.markdown('<div class="professional-card">', unsafe_allow_html=True)
+                                with _card():
                                     st.markdown("### 📈 Profit & Loss Summary")
                                     st.markdown('<p class="caption">Income and expenses by category</p>', unsafe_allow_html=True)
                                     st.dataframe(df_summary, use_container_width=True)
-                                    st.markdown('</div>', unsafe_allow_html=True)
                             else:
                                 st.info("No data available for the selected period.")
                         
                         elif report_type == "Category Details":
                             transactions = crud.list_committed_transactions(
                                 client_id,
+                                bank_id=bank_filter,
                                 date_from=start_date,
                                 date_to=end_date
                             )
@@ -1197,12 +1588,10 @@ def render_reports():
                             if transactions:
                                 df_tx = pd.DataFrame(transactions)
                                 
-                                with st.container():
-                                    st.markdown('<div class="professional-card">', unsafe_allow_html=True)
+                                with _card():
                                     st.markdown("### 📋 Transaction Details")
                                     st.markdown('<p class="caption">Detailed transaction listing</p>', unsafe_allow_html=True)
                                     st.dataframe(df_tx, use_container_width=True)
-                                    st.markdown('</div>', unsafe_allow_html=True)
                             else:
                                 st.info("No transactions found.")
                         
@@ -1215,16 +1604,155 @@ def render_reports():
         with col2:
             if st.button("Export to Excel", type="secondary", use_container_width=True):
                 show_success_message("Export feature coming soon!")
+
+
+_CLEANUP_LABELS = (
+    "Draft Transactions",
+    "Committed Transactions",
+    "Bank Accounts",
+    "Categories",
+    "Vendor Memory",
+    "Keyword Models",
+    "Commit History",
+    "Company Itself",
+)
+
+
+@st.fragment
+def _render_data_cleanup():
+    st.markdown("#### 🗑️ Data Cleanup & Deletion")
+    st.markdown('<p class="caption">⚠️ **DANGER ZONE** - Permanently delete data</p>', unsafe_allow_html=True)
+    
+    client_options = _client_options()
+    if not client_options:
+        st.info("No companies found to clean up.")
+    else:
+        # Client selection
+        selected_client = st.selectbox(
+            "Select Company to Clean",
+            (None,) + client_options,
+            format_func=lambda c: "(Select a company)" if c is None else f"{c[0]} | {c[1]}",
+        )
         
-        st.markdown('</div>', unsafe_allow_html=True)
+        if selected_client is not None:
+            client_id, client_name = selected_client
+            
+            st.markdown(f"### Cleaning: **{client_name}**")
+            
+            # Data type selection in columns
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.markdown("**Transaction Data:**")
+                delete_drafts = st.checkbox("Draft Transactions", value=True, 
+                                          help="Uncategorised/unsaved transaction data")
+                delete_committed = st.checkbox("Committed Transactions", value=False,
+                                             help="Finalised/committed transaction history")
+                
+                st.markdown("**Setup Data:**")
+                delete_banks = st.checkbox("Bank Accounts", value=False,
+                                         help="Bank account definitions")
+                delete_categories = st.checkbox("Categories", value=False,
+                                              help="Category definitions")
+            
+            with col2:
+                st.markdown("**Learning Data:**")
+                delete_vendors = st.checkbox("Vendor Memory", value=False,
+                                           help="Learned vendor→category mappings")
+                delete_keywords = st.checkbox("Keyword Models", value=False,
+                                            help="Learned keyword→category patterns")
+                
+                st.markdown("**System Data:**")
+                delete_commits = st.checkbox("Commit History", value=False,
+                                           help="Commit records and accuracy metrics")
+                delete_client = st.checkbox("Company Itself", value=False,
+                                          help="Delete the entire company profile")
+            
+            # Warning message based on selection; bit i follows _CLEANUP_LABELS[i]
+            mask = (
+                delete_drafts | delete_committed << 1 | delete_banks << 2
+                | delete_categories << 3 | delete_vendors << 4 | delete_keywords << 5
+                | delete_commits << 6 | delete_client << 7
+            )
+            selected_count = mask.bit_count()
+            
+            if selected_count > 0:
+                with st.expander("Advanced options"):
+                    batch_size = st.number_input(
+                        "Delete batch size", min_value=500, max_value=200000, value=10000, step=500,
+                        help="Rows deleted per statement; all batches run in one transaction",
+                    )
+                
+                # Confirmation
+                confirmation = st.text_input("Type 'DELETE' to confirm", 
+                                           placeholder="Type DELETE to confirm",
+                                           type="password")
+                
+                warning_text = f"⚠️ **WARNING:** You are about to delete {selected_count} type(s) of data!"
+                if confirmation:
+                    delete_summary = [
+                        f"- {label}" for i, label in enumerate(_CLEANUP_LABELS) if mask >> i & 1
+                    ]
+                    warning_text += "\n\n**Will delete:**\n" + "\n".join(delete_summary)
+                st.error(warning_text)
+                
+                if st.button("🚨 Execute Data Deletion", type="primary", 
+                           disabled=(confirmation != "DELETE"), use_container_width=True):
+                    if confirmation == "DELETE":
+                        with st.spinner("Deleting data..."):
+                            try:
+                                result = crud.delete_client_data(
+                                    client_id=client_id,
+                                    delete_drafts=delete_drafts,
+                                    delete_committed=delete_committed,
+                                    delete_banks=delete_banks,
+                                    delete_categories=delete_categories,
+                                    delete_vendor_memory=delete_vendors,
+                                    delete_keyword_model=delete_keywords,
+                                    delete_commits=delete_commits,
+                                    delete_client_itself=delete_client,
+                                    batch_size=int(batch_size),
+                                )
+                                
+                                if result.get("ok"):
+                                    deleted = result.get("deleted", {})
+                                    summary_lines = [f"- {t}: {c} records deleted" for t, c in deleted.items() if c]
+                                    _set_flash("success", "\n".join(["Data deletion completed!", *summary_lines]))
+                                    
+                                    # Clear caches and session state if needed
+                                    if delete_client:
+                                        _invalidate_clients()
+                                    if delete_banks or delete_client:
+                                        _invalidate_banks()
+                                    if delete_categories or delete_client:
+                                        _invalidate_categories()
+                                    if delete_drafts or delete_committed or delete_commits or delete_client:
+                                        _invalidate_period_caches(committed=True)
+                                    
+                                    # If current active client was deleted, reset it
+                                    if client_id == st.session_state.active_client_id:
+                                        if delete_client:
+                                            st.session_state.active_client_id = None
+                                            st.session_state.active_client_name = None
+                                        elif delete_banks:
+                                            st.session_state.bank_id = None
+                                    
+                                    st.rerun()
+                                else:
+                                    show_error_message(f"❌ Deletion failed: {result.get('error', 'Unknown error')}")
+                            except Exception as e:
+                                show_error_message(f"❌ Deletion error: {_format_exc(e)}")
+                    else:
+                        st.warning("Please type 'DELETE' to confirm deletion")
+            else:
+                st.info("Select at least one data type to delete")
 
 def render_settings():
     st.markdown("## ⚙️ Settings")
     st.markdown('<p class="caption">System configuration and database utilities</p>', unsafe_allow_html=True)
+    _render_flash()
     
-    with st.container():
-        st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-        
+    with _card():
         st.markdown("### Database Utilities")
         st.markdown('<p class="caption">Manage database connection and schema</p>', unsafe_allow_html=True)
         
@@ -1262,146 +1790,59 @@ def render_settings():
             st.markdown("#### Verify Database Schema")
             st.markdown('<p class="caption">Compare current database schema with expected schema</p>', unsafe_allow_html=True)
             
+            force_refresh = st.checkbox("Force refresh", value=False,
+                                        help="Ignore the cached result and re-read the database schema")
+            
             if st.button("Run Schema Check", type="primary", use_container_width=True):
+                if force_refresh:
+                    _run_schema_check.clear()
                 result = _run_schema_check()
                 if "error" in result:
                     show_error_message(result["error"])
                 elif result.get("issues"):
-                    with st.container():
-                        st.markdown('<div class="professional-card">', unsafe_allow_html=True)
+                    with _card():
                         st.markdown("### ⚠️ Schema Issues Found")
                         issues_df = pd.DataFrame(result["issues"])
                         st.dataframe(issues_df, use_container_width=True)
-                        st.markdown('</div>', unsafe_allow_html=True)
                 else:
                     show_success_message("✅ Schema matches perfectly!")
         
         with tab4:
-            st.markdown("#### 🗑️ Data Cleanup & Deletion")
-            st.markdown('<p class="caption">⚠️ **DANGER ZONE** - Permanently delete data</p>', unsafe_allow_html=True)
-            
-            clients = cached_clients()
-            if not clients:
-                st.info("No companies found to clean up.")
+            _render_data_cleanup()
+        
+        with st.expander("🧮 Cache Statistics"):
+            st.markdown('<p class="caption">Loads are cache misses that hit the database; clears are targeted invalidations</p>', unsafe_allow_html=True)
+            stats = _cache_stats()
+            cache_names = sorted(set(stats["loads"]) | set(stats["clears"]))
+            if cache_names:
+                stats_df = pd.DataFrame([
+                    {"cache": name, "loads": stats["loads"][name], "clears": stats["clears"][name]}
+                    for name in cache_names
+                ])
+                st.dataframe(stats_df, use_container_width=True, hide_index=True)
             else:
-                # Client selection
-                client_options = ["(Select a company)"] + [f"{c['id']} | {c['name']}" for c in clients]
-                selected_client = st.selectbox("Select Company to Clean", client_options)
-                
-                if selected_client != "(Select a company)":
-                    client_id = int(selected_client.split("|")[0].strip())
-                    client_name = selected_client.split("|")[1].strip()
-                    
-                    st.markdown(f"### Cleaning: **{client_name}**")
-                    
-                    # Data type selection in columns
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.markdown("**Transaction Data:**")
-                        delete_drafts = st.checkbox("Draft Transactions", value=True, 
-                                                  help="Uncategorised/unsaved transaction data")
-                        delete_committed = st.checkbox("Committed Transactions", value=False,
-                                                     help="Finalised/committed transaction history")
-                        
-                        st.markdown("**Setup Data:**")
-                        delete_banks = st.checkbox("Bank Accounts", value=False,
-                                                 help="Bank account definitions")
-                        delete_categories = st.checkbox("Categories", value=False,
-                                                      help="Category definitions")
-                    
-                    with col2:
-                        st.markdown("**Learning Data:**")
-                        delete_vendors = st.checkbox("Vendor Memory", value=False,
-                                                   help="Learned vendor→category mappings")
-                        delete_keywords = st.checkbox("Keyword Models", value=False,
-                                                    help="Learned keyword→category patterns")
-                        
-                        st.markdown("**System Data:**")
-                        delete_commits = st.checkbox("Commit History", value=False,
-                                                   help="Commit records and accuracy metrics")
-                        delete_client = st.checkbox("Company Itself", value=False,
-                                                  help="Delete the entire company profile")
-                    
-                    # Warning message based on selection
-                    selected_count = sum([
-                        delete_drafts, delete_committed, delete_banks, 
-                        delete_categories, delete_vendors, delete_keywords,
-                        delete_commits, delete_client
-                    ])
-                    
-                    if selected_count > 0:
-                        st.error(f"⚠️ **WARNING:** You are about to delete {selected_count} type(s) of data!")
-                        
-                        # Confirmation
-                        confirmation = st.text_input("Type 'DELETE' to confirm", 
-                                                   placeholder="Type DELETE to confirm",
-                                                   type="password")
-                        
-                        if st.button("🚨 Execute Data Deletion", type="primary", 
-                                   disabled=(confirmation != "DELETE"), use_container_width=True):
-                            if confirmation == "DELETE":
-                                with st.spinner("Deleting data..."):
-                                    try:
-                                        result = crud.delete_client_data(
-                                            client_id=client_id,
-                                            delete_drafts=delete_drafts,
-                                            delete_committed=delete_committed,
-                                            delete_banks=delete_banks,
-                                            delete_categories=delete_categories,
-                                            delete_vendor_memory=delete_vendors,
-                                            delete_keyword_model=delete_keywords,
-                                            delete_commits=delete_commits,
-                                            delete_client_itself=delete_client
-                                        )
-                                        
-                                        if result.get("ok"):
-                                            deleted = result.get("deleted", {})
-                                            st.success("✅ Data deletion completed!")
-                                            
-                                            # Clear caches and session state if needed
-                                            cache_data.clear()
-                                            
-                                            # If current active client was deleted, reset it
-                                            if client_id == st.session_state.active_client_id:
-                                                if delete_client:
-                                                    st.session_state.active_client_id = None
-                                                    st.session_state.active_client_name = None
-                                                elif delete_banks:
-                                                    st.session_state.bank_id = None
-                                            
-                                            st.rerun()
-                                        else:
-                                            show_error_message(f"❌ Deletion failed: {result.get('error', 'Unknown error')}")
-                                    except Exception as e:
-                                        show_error_message(f"❌ Deletion error: {_format_exc(e)}")
-                            else:
-                                st.warning("Please type 'DELETE' to confirm deletion")
-                    else:
-                        st.info("Select at least one data type to delete")
-        
-        st.markdown('</div>', unsafe_allow_html=True)
+                st.info("No cached data loaded yet.")
 
 def render_companies():
     st.markdown("## 🏢 Companies")
     st.markdown('<p class="caption">Manage client companies and organizations</p>', unsafe_allow_html=True)
+    _render_flash()
     
     # Subpage navigation
-    subpages = ["List", "Create", "Edit"]
     active_subpage = st.session_state.get("active_subpage", "List")
     
     # Professional tab-like navigation
-    cols = st.columns(len(subpages))
-    for idx, subpage in enumerate(subpages):
+    cols = st.columns(len(_COMPANIES_SUBPAGES))
+    for idx, subpage in enumerate(_COMPANIES_SUBPAGES):
         with cols[idx]:
-            if st.button(
+            st.button(
                 subpage,
                 use_container_width=True,
                 type="primary" if subpage == active_subpage else "secondary",
-                key=f"companies_{subpage}"
-            ):
-                st.session_state.active_subpage = subpage
-                st.rerun()
+                key=f"companies_{subpage}",
+                on_click=handle_page_transition,
+                args=("Companies", subpage),
+            )
     
     st.markdown('<div class="green-divider"></div>', unsafe_allow_html=True)
     
@@ -1412,26 +1853,21 @@ def render_companies():
     elif active_subpage == "Edit":
         render_companies_edit()
 
+@st.fragment
 def render_companies_list():
     clients = cached_clients()
     
     if not clients:
-        with st.container():
-            st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-            
+        with _card():
             st.markdown("### No Companies Found")
             st.markdown('<p class="body">Create your first company to get started with BankCat AI.</p>', unsafe_allow_html=True)
             
             if st.button("➕ Create First Company", type="primary", use_container_width=True):
                 st.session_state.active_subpage = "Create"
                 st.rerun()
-            
-            st.markdown('</div>', unsafe_allow_html=True)
         return
     
-    with st.container():
-        st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-        
+    with _card():
         col1, col2 = st.columns([3, 1])
         with col1:
             st.markdown("### Company List")
@@ -1441,38 +1877,67 @@ def render_companies_list():
                 st.session_state.active_subpage = "Create"
                 st.rerun()
         
-        for client in clients:
-            col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
-            with col1:
-                st.markdown(f"**{client['name']}**")
-                st.markdown(f'<p class="caption">{client.get("industry", "N/A")} • {client.get("country", "N/A")}</p>', unsafe_allow_html=True)
-            with col2:
-                if client.get('is_active', True):
-                    st.markdown('<span class="status-badge status-committed">Active</span>', unsafe_allow_html=True)
-                else:
-                    st.markdown('<span class="status-badge status-draft">Inactive</span>', unsafe_allow_html=True)
-            with col3:
-                if st.button("✏️ Edit", key=f"edit_{client['id']}", type="secondary", use_container_width=True):
-                    st.session_state.edit_client_id = client['id']
-                    st.session_state.active_subpage = "Edit"
-                    st.rerun()
-            with col4:
-                if st.button("🗑️ Delete", key=f"delete_{client['id']}", type="secondary", use_container_width=True):
-                    if st.session_state.active_client_id == client['id']:
-                        st.session_state.active_client_id = None
-                    crud.set_client_active(client['id'], False)
-                    cache_data.clear()
-                    show_success_message(f"Company '{client['name']}' deactivated")
-                    time.sleep(1)
-                    st.rerun()
-            st.markdown("---")
+        df_clients = pd.DataFrame.from_records([
+            {
+                "id": c["id"],
+                "name": c["name"],
+                "industry": c.get("industry") or "N/A",
+                "country": c.get("country") or "N/A",
+                "status": "Active" if c.get("is_active", True) else "Inactive",
+                "edit": False,
+                "deactivate": False,
+            }
+            for c in clients
+        ])
+        
+        edited_clients = st.data_editor(
+            df_clients,
+            column_config={
+                "name": st.column_config.TextColumn("Company", disabled=True),
+                "industry": st.column_config.TextColumn("Industry", disabled=True),
+                "country": st.column_config.TextColumn("Country", disabled=True),
+                "status": st.column_config.TextColumn("Status", disabled=True),
+                "edit": st.column_config.CheckboxColumn("✏️ Edit"),
+                "deactivate": st.column_config.CheckboxColumn("🗑️ Deactivate"),
+            },
+            column_order=["name", "industry", "country", "status", "edit", "deactivate"],
+            use_container_width=True,
+            hide_index=True,
+            key="companies_editor",
+        )
         
-        st.markdown('</div>', unsafe_allow_html=True)
+        edit_ids = edited_clients.loc[edited_clients["edit"], "id"].tolist()
+        if edit_ids:
+            st.session_state.pop("companies_editor", None)
+            st.session_state.edit_client_id = int(edit_ids[0])
+            st.session_state.active_subpage = "Edit"
+            st.rerun()
+        
+        pending = st.session_state.pending_deactivations
+        pending.clear()
+        pending.update(int(i) for i in edited_clients.loc[edited_clients["deactivate"], "id"])
+        
+        if pending:
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.markdown(f'<p class="caption">{len(pending)} company(ies) marked for deactivation</p>', unsafe_allow_html=True)
+            with col2:
+                if st.button("🗑️ Commit Deactivations", type="primary", use_container_width=True, key="commit_client_deactivations"):
+                    try:
+                        n = crud.set_clients_active(sorted(pending), False)
+                        if st.session_state.active_client_id in pending:
+                            st.session_state.active_client_id = None
+                            st.session_state.active_client_name = None
+                        pending.clear()
+                        st.session_state.pop("companies_editor", None)
+                        _invalidate_clients()
+                        _set_flash("success", f"{n} company(ies) deactivated")
+                        st.rerun()
+                    except Exception as e:
+                        show_error_message(f"Error deactivating companies: {_format_exc(e)}")
 
 def render_companies_create():
-    with st.container():
-        st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-        
+    with _card():
         st.markdown("### Create New Company")
         st.markdown('<p class="caption">Add a new client company to the system</p>', unsafe_allow_html=True)
         
@@ -1498,9 +1963,8 @@ def render_companies_create():
                             country=country,
                             business_description=description
                         )
-                        show_success_message(f"Company '{name}' created successfully!")
-                        cache_data.clear()
-                        time.sleep(1)
+                        _set_flash("success", f"Company '{name}' created successfully!")
+                        _invalidate_clients()
                         st.session_state.active_subpage = "List"
                         st.rerun()
                     except Exception as e:
@@ -1509,25 +1973,19 @@ def render_companies_create():
         if st.button("← Back to List", type="secondary", use_container_width=True):
             st.session_state.active_subpage = "List"
             st.rerun()
-        
-        st.markdown('</div>', unsafe_allow_html=True)
 
 def render_companies_edit():
     client_id = st.session_state.get("edit_client_id")
     if not client_id:
-        with st.container():
-            st.markdown('<div class="professional-card">', unsafe_allow_html=True)
+        with _card():
             st.warning("No company selected for editing.")
             
             if st.button("← Back to List", type="primary", use_container_width=True):
                 st.session_state.active_subpage = "List"
                 st.rerun()
-            
-            st.markdown('</div>', unsafe_allow_html=True)
         return
     
-    clients = cached_clients()
-    client = next((c for c in clients if c['id'] == client_id), None)
+    client = cached_client(client_id)
     
     if not client:
         show_error_message("Company not found")
@@ -1535,9 +1993,7 @@ def render_companies_edit():
         st.rerun()
         return
     
-    with st.container():
-        st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-        
+    with _card():
         st.markdown(f"### Edit Company: {client['name']}")
         st.markdown('<p class="caption">Update company information</p>', unsafe_allow_html=True)
         
@@ -1552,13 +2008,7 @@ def render_companies_edit():
             
             is_active = st.checkbox("Active", value=client.get('is_active', True))
             
-            col1, col2 = st.columns(2)
-            with col1:
-                submitted = st.form_submit_button("Save Changes", type="primary", use_container_width=True)
-            with col2:
-                if st.form_submit_button("Cancel", type="secondary"):
-                    st.session_state.active_subpage = "List"
-                    st.rerun()
+            submitted = st.form_submit_button("Save Changes", type="primary", use_container_width=True)
             
             if submitted:
                 if not name.strip():
@@ -1577,9 +2027,8 @@ def render_companies_edit():
                         if st.session_state.active_client_id == client_id:
                             st.session_state.active_client_name = name
                         
-                        show_success_message(f"Company '{name}' updated successfully!")
-                        cache_data.clear()
-                        time.sleep(1)
+                        _set_flash("success", f"Company '{name}' updated successfully!")
+                        _invalidate_clients()
                         st.session_state.active_subpage = "List"
                         st.rerun()
                     except Exception as e:
@@ -1588,29 +2037,26 @@ def render_companies_edit():
         if st.button("← Back to List", type="secondary", use_container_width=True):
             st.session_state.active_subpage = "List"
             st.rerun()
-        
-        st.markdown('</div>', unsafe_allow_html=True)
 
 def render_setup():
     active_subpage = st.session_state.get("active_subpage", "Banks")
     
     st.markdown("## ⚙️ Setup")
     st.markdown('<p class="caption">Configure banks and categories for the selected company</p>', unsafe_allow_html=True)
+    _render_flash()
     
     # Subpage navigation with icons
-    subpages = ["Banks", "Categories"]
-    cols = st.columns(len(subpages))
-    for idx, subpage in enumerate(subpages):
+    cols = st.columns(len(_SETUP_SUBPAGES))
+    for idx, (subpage, btn_text) in enumerate(_SETUP_SUBPAGES):
         with cols[idx]:
-            btn_text = "🏦 Banks" if subpage == "Banks" else "🗂️ Categories"
-            if st.button(
+            st.button(
                 btn_text,
                 use_container_width=True,
                 type="primary" if subpage == active_subpage else "secondary",
-                key=f"setup_{subpage}"
-            ):
-                st.session_state.active_subpage = subpage
-                st.rerun()
+                key=f"setup_{subpage}",
+                on_click=handle_page_transition,
+                args=("Setup", subpage),
+            )
     
     st.markdown('<div class="green-divider"></div>', unsafe_allow_html=True)
     
@@ -1633,12 +2079,11 @@ def render_setup_banks():
     elif mode == "edit":
         render_banks_edit(client_id)
 
+@st.fragment
 def render_banks_list(client_id):
     banks = cached_banks(client_id)
     
-    with st.container():
-        st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-        
+    with _card():
         col1, col2 = st.columns([3, 1])
         with col1:
             st.markdown("### 🏦 Bank Accounts")
@@ -1655,38 +2100,81 @@ def render_banks_list(client_id):
             st.markdown('<p class="body">Add your first bank account to start processing statements.</p>', unsafe_allow_html=True)
             st.markdown('</div>', unsafe_allow_html=True)
         else:
-            for bank in banks:
-                col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+            df_banks = pd.DataFrame.from_records([
+                {
+                    "id": b["id"],
+                    "bank_name": b["bank_name"],
+                    "account_type": b.get("account_type") or "Current",
+                    "account_masked": b.get("account_masked") or "N/A",
+                    "currency": b.get("currency") or "USD",
+                    "status": "Active" if b.get("is_active", True) else "Inactive",
+                    "edit": False,
+                    "deactivate": False,
+                }
+                for b in banks
+            ])
+            
+            edited_banks = st.data_editor(
+                df_banks,
+                column_config={
+                    "bank_name": st.column_config.TextColumn("Bank", disabled=True),
+                    "account_type": st.column_config.TextColumn("Account Type", disabled=True),
+                    "account_masked": st.column_config.TextColumn("Account", disabled=True),
+                    "currency": st.column_config.TextColumn("Currency", disabled=True),
+                    "status": st.column_config.TextColumn("Status", disabled=True),
+                    "edit": st.column_config.CheckboxColumn("✏️ Edit"),
+                    "deactivate": st.column_config.CheckboxColumn("🗑️ Deactivate"),
+                },
+                column_order=["bank_name", "account_type", "account_masked", "currency", "status", "edit", "deactivate"],
+                use_container_width=True,
+                hide_index=True,
+                key="banks_editor",
+            )
+            
+            edit_ids = edited_banks.loc[edited_banks["edit"], "id"].tolist()
+            if edit_ids:
+                st.session_state.pop("banks_editor", None)
+                st.session_state.setup_bank_edit_id = int(edit_ids[0])
+                st.session_state.setup_banks_mode = "edit"
+                st.rerun()
+            
+            pending = st.session_state.pending_bank_deactivations
+            pending.clear()
+            pending.update(int(i) for i in edited_banks.loc[edited_banks["deactivate"], "id"])
+            
+            if pending:
+                col1, col2 = st.columns([3, 1])
                 with col1:
-                    st.markdown(f"**{bank['bank_name']}**")
-                    st.markdown(f'<p class="caption">{bank.get("account_type", "Current")} • {bank.get("account_masked", "N/A")} • {bank.get("currency", "USD")}</p>', unsafe_allow_html=True)
+                    st.markdown(f'<p class="caption">{len(pending)} bank(s) marked for deactivation</p>', unsafe_allow_html=True)
                 with col2:
-                    if bank.get('is_active', True):
-                        st.markdown('<span class="status-badge status-committed">Active</span>', unsafe_allow_html=True)
-                    else:
-                        st.markdown('<span class="status-badge status-draft">Inactive</span>', unsafe_allow_html=True)
-                with col3:
-                    if st.button("✏️ Edit", key=f"edit_bank_{bank['id']}", type="secondary", use_container_width=True):
-                        st.session_state.setup_bank_edit_id = bank['id']
-                        st.session_state.setup_banks_mode = "edit"
-                        st.rerun()
-                with col4:
-                    if st.button("🗑️ Delete", key=f"delete_bank_{bank['id']}", type="secondary", use_container_width=True):
-                        if crud.bank_has_transactions(bank['id']):
-                            show_warning_message("Cannot delete bank with existing transactions")
-                        else:
-                            crud.set_bank_active(bank['id'], False)
-                            cache_data.clear()
-                            show_success_message(f"Bank '{bank['bank_name']}' deactivated")
-                            st.rerun()
-                st.markdown("---")
-        
-        st.markdown('</div>', unsafe_allow_html=True)
+                    if st.button("🗑️ Commit Deactivations", type="primary", use_container_width=True, key="commit_bank_deactivations"):
+                        try:
+                            blocked = crud.banks_with_transactions(sorted(pending))
+                            allowed = sorted(pending.difference(blocked))
+                            names = cached_bank_names(client_id)
+                            blocked_msg = (
+                                "Cannot deactivate banks with existing transactions: "
+                                + ", ".join(names.get(bid, f"#{bid}") for bid in blocked)
+                            )
+                            if not allowed:
+                                show_warning_message(blocked_msg)
+                            else:
+                                n = crud.set_banks_active(allowed, False)
+                                if st.session_state.bank_id in allowed:
+                                    st.session_state.bank_id = None
+                                pending.clear()
+                                st.session_state.pop("banks_editor", None)
+                                _invalidate_banks()
+                                if blocked:
+                                    _set_flash("warning", f"{n} bank(s) deactivated. {blocked_msg}")
+                                else:
+                                    _set_flash("success", f"{n} bank(s) deactivated")
+                                st.rerun()
+                        except Exception as e:
+                            show_error_message(f"Error deactivating banks: {_format_exc(e)}")
 
 def render_banks_create(client_id):
-    with st.container():
-        st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-        
+    with _card():
         st.markdown("### Add Bank Account")
         st.markdown('<p class="caption">Configure a new bank account</p>', unsafe_allow_html=True)
         
@@ -1694,8 +2182,7 @@ def render_banks_create(client_id):
             col1, col2 = st.columns(2)
             with col1:
                 bank_name = st.text_input("Bank Name *", placeholder="e.g., Chase Bank, HSBC")
-                account_type = st.selectbox("Account Type *", 
-                                           ["Current", "Credit Card", "Savings", "Investment", "Wallet"])
+                account_type = st.selectbox("Account Type *", _ACCOUNT_TYPES)
             with col2:
                 account_masked = st.text_input("Account Number (masked)", 
                                               placeholder="e.g., ****1234")
@@ -1703,13 +2190,7 @@ def render_banks_create(client_id):
             
             opening_balance = st.number_input("Opening Balance", value=0.0, step=100.0, format="%.2f")
             
-            col1, col2 = st.columns(2)
-            with col1:
-                submitted = st.form_submit_button("Create Bank", type="primary", use_container_width=True)
-            with col2:
-                if st.form_submit_button("Cancel", type="secondary"):
-                    st.session_state.setup_banks_mode = "list"
-                    st.rerun()
+            submitted = st.form_submit_button("Create Bank", type="primary", use_container_width=True)
             
             if submitted:
                 if not bank_name.strip():
@@ -1724,9 +2205,8 @@ def render_banks_create(client_id):
                             masked=account_masked,
                             opening_balance=opening_balance
                         )
-                        show_success_message(f"Bank '{bank_name}' added successfully!")
-                        cache_data.clear()
-                        time.sleep(1)
+                        _set_flash("success", f"Bank '{bank_name}' added successfully!")
+                        _invalidate_banks()
                         st.session_state.setup_banks_mode = "list"
                         st.rerun()
                     except Exception as e:
@@ -1735,8 +2215,6 @@ def render_banks_create(client_id):
         if st.button("← Back to List", type="secondary", use_container_width=True):
             st.session_state.setup_banks_mode = "list"
             st.rerun()
-        
-        st.markdown('</div>', unsafe_allow_html=True)
 
 def render_banks_edit(client_id):
     bank_id = st.session_state.get("setup_bank_edit_id")
@@ -1746,18 +2224,15 @@ def render_banks_edit(client_id):
         st.rerun()
         return
     
-    banks = cached_banks(client_id)
-    bank = next((b for b in banks if b['id'] == bank_id), None)
+    bank = cached_bank(bank_id)
     
-    if not bank:
+    if not bank or bank.get('client_id') != client_id:
         show_error_message("Bank not found")
         st.session_state.setup_banks_mode = "list"
         st.rerun()
         return
     
-    with st.container():
-        st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-        
+    with _card():
         st.markdown(f"### Edit Bank: {bank['bank_name']}")
         st.markdown('<p class="caption">Update bank account details</p>', unsafe_allow_html=True)
         
@@ -1765,10 +2240,8 @@ def render_banks_edit(client_id):
             col1, col2 = st.columns(2)
             with col1:
                 bank_name = st.text_input("Bank Name *", value=bank.get('bank_name', ''))
-                account_type = st.selectbox("Account Type *", 
-                                           ["Current", "Credit Card", "Savings", "Investment", "Wallet"],
-                                           index=["Current", "Credit Card", "Savings", "Investment", "Wallet"]
-                                           .index(bank.get('account_type', 'Current')))
+                account_type = st.selectbox("Account Type *", _ACCOUNT_TYPES,
+                                           index=_ACCOUNT_TYPE_IDX.get(bank.get('account_type'), 0))
             with col2:
                 account_masked = st.text_input("Account Number (masked)", 
                                               value=bank.get('account_masked', ''))
@@ -1779,13 +2252,7 @@ def render_banks_edit(client_id):
                                              step=100.0, format="%.2f")
             is_active = st.checkbox("Active", value=bank.get('is_active', True))
             
-            col1, col2 = st.columns(2)
-            with col1:
-                submitted = st.form_submit_button("Save Changes", type="primary", use_container_width=True)
-            with col2:
-                if st.form_submit_button("Cancel", type="secondary"):
-                    st.session_state.setup_banks_mode = "list"
-                    st.rerun()
+            submitted = st.form_submit_button("Save Changes", type="primary", use_container_width=True)
             
             if submitted:
                 if not bank_name.strip():
@@ -1802,9 +2269,8 @@ def render_banks_edit(client_id):
                         )
                         crud.set_bank_active(bank_id, is_active)
                         
-                        show_success_message(f"Bank '{bank_name}' updated successfully!")
-                        cache_data.clear()
-                        time.sleep(1)
+                        _set_flash("success", f"Bank '{bank_name}' updated successfully!")
+                        _invalidate_banks()
                         st.session_state.setup_banks_mode = "list"
                         st.rerun()
                     except Exception as e:
@@ -1813,8 +2279,6 @@ def render_banks_edit(client_id):
         if st.button("← Back to List", type="secondary", use_container_width=True):
             st.session_state.setup_banks_mode = "list"
             st.rerun()
-        
-        st.markdown('</div>', unsafe_allow_html=True)
 
 def render_setup_categories():
     client_id = _require_active_client()
@@ -1832,10 +2296,9 @@ def render_setup_categories():
 
 def render_categories_list(client_id):
     categories = cached_categories(client_id)
+    categories_by_type = cached_categories_by_type(client_id)
     
-    with st.container():
-        st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-        
+    with _card():
         col1, col2 = st.columns([3, 1])
         with col1:
             st.markdown("### 🗂️ Categories")
@@ -1853,33 +2316,43 @@ def render_categories_list(client_id):
             st.markdown('</div>', unsafe_allow_html=True)
         else:
             # Group by type
-            for cat_type in ["Income", "Expense", "Other"]:
-                type_cats = [c for c in categories if c.get('type') == cat_type and c.get('is_active', True)]
+            for cat_type in ("Income", "Expense", "Other"):
+                type_cats = categories_by_type.get(cat_type, [])
                 if type_cats:
                     st.markdown(f"**{cat_type} Categories**")
-                    for cat in type_cats:
-                        col1, col2, col3 = st.columns([3, 2, 1])
-                        with col1:
-                            st.markdown(f"• **{cat['category_name']}**")
-                            st.markdown(f'<p class="caption">Nature: {cat.get("nature", "Any")}</p>', unsafe_allow_html=True)
-                        with col2:
-                            if cat.get('is_active', True):
-                                st.markdown('<span class="chip chip-primary">Active</span>', unsafe_allow_html=True)
-                            else:
-                                st.markdown('<span class="chip">Inactive</span>', unsafe_allow_html=True)
-                        with col3:
-                            if st.button("✏️ Edit", key=f"edit_cat_{cat['id']}", type="secondary", use_container_width=True):
-                                st.session_state.setup_category_edit_id = cat['id']
-                                st.session_state.setup_categories_mode = "edit"
-                                st.rerun()
+                    df_cats = pd.DataFrame.from_records([
+                        {
+                            "id": c["id"],
+                            "category_name": c["category_name"],
+                            "nature": c.get("nature") or "Any",
+                            "status": "Active" if c.get("is_active", True) else "Inactive",
+                            "edit": False,
+                        }
+                        for c in type_cats
+                    ])
+                    edited_cats = st.data_editor(
+                        df_cats,
+                        column_config={
+                            "category_name": st.column_config.TextColumn("Category", disabled=True),
+                            "nature": st.column_config.TextColumn("Nature", disabled=True),
+                            "status": st.column_config.TextColumn("Status", disabled=True),
+                            "edit": st.column_config.CheckboxColumn("✏️ Edit"),
+                        },
+                        column_order=["category_name", "nature", "status", "edit"],
+                        use_container_width=True,
+                        hide_index=True,
+                        key=f"categories_editor_{cat_type}",
+                    )
+                    edit_ids = edited_cats.loc[edited_cats["edit"], "id"].tolist()
+                    if edit_ids:
+                        st.session_state.pop(f"categories_editor_{cat_type}", None)
+                        st.session_state.setup_category_edit_id = int(edit_ids[0])
+                        st.session_state.setup_categories_mode = "edit"
+                        st.rerun()
                     st.markdown("---")
-        
-        st.markdown('</div>', unsafe_allow_html=True)
 
 def render_categories_create(client_id):
-    with st.container():
-        st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-        
+    with _card():
         st.markdown("### Add Category")
         st.markdown('<p class="caption">Create a new transaction category</p>', unsafe_allow_html=True)
         
@@ -1889,13 +2362,7 @@ def render_categories_create(client_id):
             nature = st.selectbox("Nature", ["Any", "Dr", "Cr"], 
                                  help="Dr for Debit (usually expenses), Cr for Credit (usually income)")
             
-            col1, col2 = st.columns(2)
-            with col1:
-                submitted = st.form_submit_button("Create Category", type="primary", use_container_width=True)
-            with col2:
-                if st.form_submit_button("Cancel", type="secondary"):
-                    st.session_state.setup_categories_mode = "list"
-                    st.rerun()
+            submitted = st.form_submit_button("Create Category", type="primary", use_container_width=True)
             
             if submitted:
                 if not name.strip():
@@ -1908,9 +2375,8 @@ def render_categories_create(client_id):
                             typ=cat_type,
                             nature=nature
                         )
-                        show_success_message(f"Category '{name}' added successfully!")
-                        cache_data.clear()
-                        time.sleep(1)
+                        _set_flash("success", f"Category '{name}' added successfully!")
+                        _invalidate_categories()
                         st.session_state.setup_categories_mode = "list"
                         st.rerun()
                     except Exception as e:
@@ -1919,8 +2385,6 @@ def render_categories_create(client_id):
         if st.button("← Back to List", type="secondary", use_container_width=True):
             st.session_state.setup_categories_mode = "list"
             st.rerun()
-        
-        st.markdown('</div>', unsafe_allow_html=True)
 
 def render_categories_edit(client_id):
     cat_id = st.session_state.get("setup_category_edit_id")
@@ -1930,8 +2394,7 @@ def render_categories_edit(client_id):
         st.rerun()
         return
     
-    categories = cached_categories(client_id)
-    category = next((c for c in categories if c['id'] == cat_id), None)
+    category = cached_categories_by_id(client_id).get(cat_id)
     
     if not category:
         show_error_message("Category not found")
@@ -1939,9 +2402,7 @@ def render_categories_edit(client_id):
         st.rerun()
         return
     
-    with st.container():
-        st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-        
+    with _card():
         st.markdown(f"### Edit Category: {category['category_name']}")
         st.markdown('<p class="caption">Update category details</p>', unsafe_allow_html=True)
         
@@ -1955,30 +2416,23 @@ def render_categories_edit(client_id):
                                  .index(category.get('nature', 'Any')))
             is_active = st.checkbox("Active", value=category.get('is_active', True))
             
-            col1, col2 = st.columns(2)
-            with col1:
-                submitted = st.form_submit_button("Save Changes", type="primary", use_container_width=True)
-            with col2:
-                if st.form_submit_button("Cancel", type="secondary"):
-                    st.session_state.setup_categories_mode = "list"
-                    st.rerun()
+            submitted = st.form_submit_button("Save Changes", type="primary", use_container_width=True)
             
             if submitted:
                 if not name.strip():
                     show_error_message("Category name is required")
                 else:
                     try:
-                        crud.update_category(
+                        crud.update_category_full(
                             cat_id=cat_id,
                             name=name,
                             typ=cat_type,
-                            nature=nature
+                            nature=nature,
+                            is_active=is_active
                         )
-                        crud.set_category_active(cat_id, is_active)
                         
-                        show_success_message(f"Category '{name}' updated successfully!")
-                        cache_data.clear()
-                        time.sleep(1)
+                        _set_flash("success", f"Category '{name}' updated successfully!")
+                        _invalidate_categories()
                         st.session_state.setup_categories_mode = "list"
                         st.rerun()
                     except Exception as e:
@@ -1987,75 +2441,338 @@ def render_categories_edit(client_id):
         if st.button("← Back to List", type="secondary", use_container_width=True):
             st.session_state.setup_categories_mode = "list"
             st.rerun()
+
+@st.cache_resource
+def _executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=2)
+
+
+@st.cache_resource
+def _suggestion_jobs() -> dict:
+    """Running suggestion jobs across all sessions, {(client_id, bank_id, period): Future}"""
+    return {"lock": threading.Lock(), "futures": {}}
+
+
+def _submit_suggestions(client_id: int, bank_id: int, period: str, bank_account_type: str | None) -> Future | None:
+    """Start process_suggestions on the shared pool, or None if the period already has a job running"""
+    jobs = _suggestion_jobs()
+    key = (client_id, bank_id, period)
+    ctx = get_script_run_ctx()
+    
+    def run():
+        # Pool threads carry no script context; lend this session's to the cached DB engine lookups
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return crud.process_suggestions(client_id, bank_id, period, bank_account_type=bank_account_type)
+    
+    with jobs["lock"]:
+        futures = jobs["futures"]
+        for done_key in [k for k, f in futures.items() if f.done()]:
+            del futures[done_key]
+        if key in futures:
+            return None
+        futures[key] = _executor().submit(run)
+        return futures[key]
+
+
+@st.fragment(run_every=1)
+def _poll_suggestions():
+    """Wait on the background suggestion job, then rerun the page with fresh drafts"""
+    fut = st.session_state.suggest_fut
+    if fut is None:
+        # Nothing to wait on; a full rerun stops rendering this timer
+        st.rerun()
+    if not fut.done():
+        st.markdown('<p class="caption">😺 Cat is analyzing transactions...</p>', unsafe_allow_html=True)
+        return
+    st.session_state.suggest_fut = None
+    st.session_state.processing_suggestions = False
+    try:
+        _set_flash("success", f"Suggested {fut.result()} categories!")
+    except Exception as e:
+        _set_flash("error", f"Suggestion failed: {_format_exc(e)}")
+    _invalidate_period_caches()
+    st.rerun()
+
+@st.fragment
+def _render_review_and_actions(client_id: int, bank_id: int, period: str, bank_obj: dict, date_from, date_to):
+    """Steps 5-7 for the selected item; edits and saves rerun only this fragment"""
+    selected_item_id = st.session_state.categorisation_selected_item
+    summary_version = st.session_state.summary_version
+    draft_summary = cached_draft_summary(client_id, bank_id, period, summary_version)
+    commit_summary = cached_commit_summary(client_id, bank_id, period, summary_version)
+    unsaved = {}
+    _render_flash()
+    
+    # --- Step 5: Main View Table ---
+    with _card():
+        st.markdown("### 5. Transaction Review")
+        st.markdown('<p class="caption">Review and edit transaction categorizations</p>', unsafe_allow_html=True)
         
-        st.markdown('</div>', unsafe_allow_html=True)
+        if selected_item_id and selected_item_id.startswith("draft_"):
+            try:
+                df_d = _session_draft_df(client_id, bank_id, period)
+                if not df_d.empty:
+                    
+                    category_names = tuple(
+                        c.get("category_name", "") for c in cached_categories(client_id) if c.get("is_active", True)
+                    )
+                    usage = Counter(c for c in df_d["final_category"].dropna() if c)
+                    category_names = _capped_category_options(category_names, tuple(usage.items()))
+                    
+                    unsaved = _unsaved_draft_edits(client_id, bank_id, period)
+                    df_page, page = _page_slice(df_d, key=f"draft_page_{selected_item_id}")
+                    editor_key = f"draft_editor_{client_id}_{bank_id}_{period}_{st.session_state.draft_version}_{page}"
+                    df_page = _collect_page_edits(editor_key, df_page, unsaved)
+                    
+                    edited_df = st.data_editor(
+                        df_page,
+                        column_config={
+                            "id": st.column_config.NumberColumn("ID", disabled=True),
+                            "tx_date": st.column_config.DateColumn("Date", disabled=True),
+                            "description": st.column_config.TextColumn("Description", disabled=True),
+                            "debit": st.column_config.NumberColumn("Debit", format="%.2f", disabled=True),
+                            "credit": st.column_config.NumberColumn("Credit", format="%.2f", disabled=True),
+                            "balance": st.column_config.NumberColumn("Balance", format="%.2f", disabled=True),
+                            "suggested_category": st.column_config.TextColumn("AI Category", disabled=True),
+                            "suggested_vendor": st.column_config.TextColumn("AI Vendor", disabled=True),
+                            "confidence": st.column_config.NumberColumn("Confidence", format="%.1f%%", disabled=True),
+                            "final_category": st.column_config.SelectboxColumn(
+                                "Final Category",
+                                options=category_names,
+                                required=False
+                            ),
+                            "final_vendor": st.column_config.TextColumn(
+                                "Final Vendor",
+                                required=False
+                            ),
+                        },
+                        column_order=[
+                            "tx_date", "description", "debit", "credit", 
+                            "suggested_category", "suggested_vendor", "confidence",
+                            "final_category", "final_vendor"
+                        ],
+                        use_container_width=True,
+                        hide_index=True,
+                        key=editor_key
+                    )
+                    
+                else:
+                    st.info("No draft rows found.")
+            except Exception as e:
+                show_error_message(f"Unable to load draft rows: {_format_exc(e)}")
+        
+        elif selected_item_id and selected_item_id.startswith("committed"):
+            try:
+                df_c = cached_committed_df(client_id, bank_id, period, summary_version)
+                if not df_c.empty:
+                    df_c_page, _ = _page_slice(df_c, key=f"committed_page_{selected_item_id}")
+                    st.dataframe(df_c_page, use_container_width=True, hide_index=True)
+                else:
+                    st.info("No committed rows found.")
+            except Exception as e:
+                show_error_message(f"Unable to load committed rows: {_format_exc(e)}")
+    
+    # --- Step 6: Progress Summary ---
+    if draft_summary and selected_item_id.startswith("draft_"):
+        with _card():
+            st.markdown("### 6. Progress Summary")
+            st.markdown('<p class="caption">Track your categorization progress</p>', unsafe_allow_html=True)
+            
+            total_rows = int(draft_summary.get("row_count") or 0)
+            suggested_count = 0
+            if draft_summary:
+                suggested_count = int(draft_summary.get("suggested_count") or 0)
+            final_count = int(draft_summary.get("final_count") or 0)
+            pending_rows = total_rows - final_count
+            
+            col1, col2, col3, col4 = st.columns(4)
+            
+            with col1:
+                st.metric("Total Rows", total_rows)
+            
+            with col2:
+                suggested_pct = (suggested_count / total_rows * 100) if total_rows > 0 else 0
+                st.metric("AI Suggested", suggested_count, f"{suggested_pct:.1f}%")
+            
+            with col3:
+                final_pct = (final_count / total_rows * 100) if total_rows > 0 else 0
+                st.metric("User Finalised", final_count, f"{final_pct:.1f}%")
+            
+            with col4:
+                pending_pct = (pending_rows / total_rows * 100) if total_rows > 0 else 0
+                delta_color = "inverse" if pending_rows > 0 else "normal"
+                st.metric("Pending Review", pending_rows, f"{pending_pct:.1f}%", delta_color=delta_color)
+    
+    # --- Step 7: Action Buttons ---
+    with _card():
+        st.markdown("### 7. Actions")
+        st.markdown('<p class="caption">Available actions for the selected dataset</p>', unsafe_allow_html=True)
+        
+        if selected_item_id.startswith("draft_"):
+            summary = draft_summary or {}
+            total_rows = int(summary.get("row_count") or 0)
+            if total_rows == 0:
+                st.info("No draft rows to act on yet.")
+            else:
+                suggested_count = int(summary.get("suggested_count") or 0)
+                final_count = int(summary.get("final_count") or 0)
+                pending = max(total_rows - final_count, 0)
+                
+                action_cols = st.columns(3)
+                
+                # The 1s poller only exists while this session has a suggestion job
+                if st.session_state.suggest_fut is not None:
+                    _poll_suggestions()
+                
+                with action_cols[0]:
+                    if suggested_count == 0:
+                        if st.button("🤖 Suggest Categories", type="primary", use_container_width=True, 
+                                   disabled=st.session_state.processing_suggestions):
+                            if not st.session_state.processing_suggestions:
+                                fut = _submit_suggestions(client_id, bank_id, period, bank_obj.get("account_type"))
+                                if fut is None:
+                                    show_info_message("Suggestions are already running for this period.")
+                                else:
+                                    st.session_state.processing_suggestions = True
+                                    st.session_state.suggest_fut = fut
+                                    st.rerun(scope="fragment")
+                    else:
+                        if st.button("🔄 Re-suggest Categories", type="secondary", use_container_width=True,
+                                   disabled=st.session_state.processing_suggestions):
+                            show_info_message("Already suggested. Edit categories in the table above.")
+                
+                with action_cols[1]:
+                    if st.button("💾 Save Draft Changes", type="primary", use_container_width=True, key="save_draft_changes"):
+                        if not unsaved:
+                            show_info_message("No changes detected to save. Make edits in the table first.")
+                        else:
+                            # Stored (final_category, final_vendor) per draft row id
+                            originals = {
+                                int(i): (c, v) for i, c, v in zip(
+                                    df_d["id"].tolist(), df_d["final_category"].tolist(), df_d["final_vendor"].tolist()
+                                )
+                            }
+                            rows_to_save = [
+                                {
+                                    "id": row_id,
+                                    "final_category": edits.get("final_category") or originals[row_id][0],
+                                    "final_vendor": edits.get("final_vendor") or originals[row_id][1],
+                                }
+                                for row_id, edits in unsaved.items()
+                                if row_id in originals
+                            ]
+                            # Skip rows edited back to their stored values
+                            rows_to_save = [
+                                r for r in rows_to_save
+                                if (r["final_category"], r["final_vendor"]) != originals[r["id"]]
+                            ]
+                            
+                            if rows_to_save:
+                                with st.spinner("😺 Cat is saving your changes..."):
+                                    try:
+                                        updated = crud.save_review_changes(rows_to_save)
+                                        _set_flash("success", f"Saved {updated} changes!")
+                                        _invalidate_period_caches()
+                                        st.rerun(scope="fragment")
+                                    except Exception as e:
+                                        show_error_message(f"❌ Save failed: {_format_exc(e)}")
+                            else:
+                                show_warning_message("No valid changes to save")
+                
+                with action_cols[2]:
+                    if pending == 0:
+                        # COMMIT SECTION
+                        if st.button("🔒 Commit Final Now", type="primary", use_container_width=True,
+                                   disabled=st.session_state.processing_commit, key="commit_final_button"):
+                            
+                            ss = st.session_state
+                            if ss.processing_commit:
+                                st.stop()
+                            ss.processing_commit = True
+                            
+                            with st.spinner("😺 Cat is locking transactions..."):
+                                try:
+                                    result = crud.commit_period(client_id, bank_id, period, 
+                                                              committed_by="Accountant")
+                                    
+                                    if result.get("ok"):
+                                        # Clear states; the success toast shows on the next run
+                                        if result.get("rows"):
+                                            ss.just_committed = result["rows"]
+                                        ss.categorisation_selected_item = None
+                                        ss.processing_commit = False
+                                        _finish_write_cycle(committed=True)
+                                    else:
+                                        show_error_message(f"❌ Commit failed: {result.get('msg', 'Unknown error')}")
+                                        ss.processing_commit = False
+                                except Exception as e:
+                                    show_error_message(f"❌ Commit error: {_format_exc(e)}")
+                                    ss.processing_commit = False
+                    else:
+                        st.info(f"📝 **Finalise {pending} more rows to commit**")
+        
+        elif selected_item_id.startswith("committed"):
+            st.success("✅ **Committed & Locked** - This data is now available in Reports")
+            
+            info = cached_commit_metrics(client_id, bank_id, period, date_from, date_to)
+            
+            if info:
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Rows Committed", info.get("rows_committed", 0))
+                with col2:
+                    st.metric("Accuracy", f"{info.get('accuracy', 0)*100:.1f}%")
+                with col3:
+                    st.metric("Committed By", info.get("committed_by", "N/A"))
+
 
 def render_categorisation():
     st.markdown("## 🧠 Categorisation")
     st.markdown('<p class="caption">Upload, categorize, and commit bank statement transactions</p>', unsafe_allow_html=True)
+    _render_flash()
+    if st.session_state.just_committed is not None:
+        st.toast(f"Successfully committed {st.session_state.just_committed} rows!", icon="✅")
+        st.balloons()
+        st.session_state.just_committed = None
     
     client_id = _require_active_client()
     if not client_id:
         return
 
-    try:
-        banks_active = crud.list_banks(client_id, include_inactive=False)
-    except Exception as e:
-        show_error_message(f"Unable to load active banks. {_format_exc(e)}")
-        return
-
-    if not banks_active:
-        with st.container():
-            st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-            
+    banks_by_id = cached_active_banks_by_id(client_id)
+    if not banks_by_id:
+        with _card():
             st.markdown("### No Active Banks")
             st.markdown('<p class="body">Add at least one active bank account to start categorising transactions.</p>', unsafe_allow_html=True)
             
-            if st.button("🏦 Add Bank Account", type="primary", use_container_width=True):
-                handle_page_transition("Setup", "Banks")
-            
-            st.markdown('</div>', unsafe_allow_html=True)
+            st.button("🏦 Add Bank Account", type="primary", use_container_width=True, on_click=handle_page_transition, args=("Setup", "Banks"))
         return
 
     # --- Step 1: Bank Selection ---
-    with st.container():
-        st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-        
+    with _card():
         st.markdown("### 1. Select Bank")
         st.markdown('<p class="caption">Choose a bank account to work with</p>', unsafe_allow_html=True)
         
-        bank_options = []
-        for b in banks_active:
-            bank_options.append(f"{b['id']} | {b['bank_name']} ({b['account_type']})")
-        
-        selected_index = 0
-        if st.session_state.bank_id:
-            for i, opt in enumerate(bank_options):
-                if opt.startswith(f"{st.session_state.bank_id} |"):
-                    selected_index = i
-                    break
+        bank_ids = list(banks_by_id)
+        id_to_pos = {bid: i for i, bid in enumerate(bank_ids)}
         
-        bank_pick = st.selectbox("Select Bank", bank_options, index=selected_index, label_visibility="collapsed")
-        bank_id = int(bank_pick.split("|")[0].strip())
+        bank_id = st.selectbox(
+            "Select Bank",
+            bank_ids,
+            index=id_to_pos.get(st.session_state.bank_id, 0),
+            format_func=lambda bid: f"{bid} | {banks_by_id[bid]['bank_name']} ({banks_by_id[bid]['account_type']})",
+            label_visibility="collapsed",
+        )
         st.session_state.bank_id = bank_id
-        bank_obj = [b for b in banks_active if int(b["id"]) == bank_id][0]
-        
-        st.markdown('</div>', unsafe_allow_html=True)
+        bank_obj = banks_by_id[bank_id]
 
     # --- Step 2: Period Selection ---
-    with st.container():
-        st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-        
+    with _card():
         st.markdown("### 2. Period Selection")
         st.markdown('<p class="caption">Choose the time period for transactions</p>', unsafe_allow_html=True)
         
         col1, col2, col3, col4 = st.columns([1, 1, 1, 2])
         
-        month_names = [
-            "Jan", "Feb", "Mar", "Apr", "May", "Jun",
-            "Jul", "Aug", "Sep", "Oct", "Nov", "Dec",
-        ]
-        
         with col1:
             st.markdown('<p class="label">Year</p>', unsafe_allow_html=True)
             year_range = list(range(2020, 2031))
@@ -2064,77 +2781,57 @@ def render_categorisation():
         
         with col2:
             st.markdown('<p class="label">Month</p>', unsafe_allow_html=True)
-            month = st.selectbox("Month", month_names, index=month_names.index(st.session_state.month), label_visibility="collapsed")
+            month = st.selectbox("Month", _MONTH_NAMES, index=_MONTH_TO_IDX[st.session_state.month] - 1, label_visibility="collapsed")
             st.session_state.month = month
+            month_idx = _MONTH_TO_IDX[month]
         
         with col3:
             st.markdown('<p class="label">Period</p>', unsafe_allow_html=True)
-            period = f"{year}-{month_names.index(month)+1:02d}"
+            period = f"{year}-{month_idx:02d}"
             st.text_input("Period", value=period, disabled=True, label_visibility="collapsed")
             st.session_state.period = period
         
         with col4:
             st.markdown('<p class="label">Date Range</p>', unsafe_allow_html=True)
-            month_idx = month_names.index(month) + 1
             last_day = calendar.monthrange(year, month_idx)[1]
             
-            try:
-                if st.session_state.date_from is None:
-                    st.session_state.date_from = dt.date(year, month_idx, 1)
-                if st.session_state.date_to is None:
-                    st.session_state.date_to = dt.date(year, month_idx, last_day)
-                
-                default_range = (
-                    st.session_state.date_from,
-                    st.session_state.date_to,
-                )
-                dr = st.date_input("Date Range", value=default_range, label_visibility="collapsed")
-                
-                if isinstance(dr, tuple) and len(dr) == 2:
-                    date_from, date_to = dr
-                else:
-                    date_from = dr
-                    date_to = dr
-                
-                st.session_state.date_from = date_from
-                st.session_state.date_to = date_to
-                
-            except Exception as e:
+            # Reset the range to the whole month when the period changes
+            if st.session_state.date_from is None or st.session_state.get("date_range_period") != period:
                 st.session_state.date_from = dt.date(year, month_idx, 1)
                 st.session_state.date_to = dt.date(year, month_idx, last_day)
-                date_from = st.session_state.date_from
-                date_to = st.session_state.date_to
-        
-        st.markdown('</div>', unsafe_allow_html=True)
+                st.session_state.date_range_period = period
+            
+            dr = st.date_input(
+                "Date Range",
+                value=(st.session_state.date_from, st.session_state.date_to),
+                label_visibility="collapsed",
+            )
+            if isinstance(dr, tuple):
+                date_from, date_to = (dr[0], dr[-1]) if dr else (st.session_state.date_from, st.session_state.date_to)
+            else:
+                date_from = date_to = dr
+            
+            if (date_from, date_to) != (st.session_state.date_from, st.session_state.date_to):
+                st.session_state.date_from = date_from
+                st.session_state.date_to = date_to
 
     # --- Get data summaries ---
-    draft_summary = None
-    commit_summary = None
-    try:
-        draft_summary = crud.get_draft_summary(client_id, bank_id, period)
-        commit_summary = crud.get_commit_summary(client_id, bank_id, period)
-    except Exception as e:
-        show_error_message(f"Error loading summaries: {_format_exc(e)}")
+    summary_version = st.session_state.summary_version
+    draft_summary = cached_draft_summary(client_id, bank_id, period, summary_version)
+    commit_summary = cached_commit_summary(client_id, bank_id, period, summary_version)
 
     # --- Step 3: Upload Section (only if no data exists) ---
     if not draft_summary and not commit_summary:
-        with st.container():
-            st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-            
+        with _card():
             st.markdown("### 3. Upload Statement")
             st.markdown('<p class="caption">Upload CSV bank statement or use template</p>', unsafe_allow_html=True)
             
             col1, col2 = st.columns([1, 2])
             
             with col1:
-                stmt_template = pd.DataFrame([
-                    {"Date": "25/09/2025", "Description": "POS Purchase Example", "Dr": 100.00, "Cr": 0.00, "Closing": ""}
-                ])
-                buf = io.StringIO()
-                stmt_template.to_csv(buf, index=False)
                 st.download_button(
                     "📥 Download Template",
-                    data=buf.getvalue(),
+                    data=_stmt_template_bytes(),
                     file_name="statement_template.csv",
                     mime="text/csv",
                     use_container_width=True,
@@ -2146,8 +2843,11 @@ def render_categorisation():
                 
                 if up_stmt is not None:
                     try:
-                        df_raw = pd.read_csv(up_stmt)
-                        st.session_state.df_raw = df_raw
+                        # Parse once per uploaded file; session state keeps the only copy
+                        if st.session_state.df_raw is None or st.session_state.stmt_file_id != up_stmt.file_id:
+                            st.session_state.df_raw = _read_statement_csv(up_stmt)
+                            st.session_state.stmt_file_id = up_stmt.file_id
+                        df_raw = st.session_state.df_raw
                         st.session_state.file_uploaded = True
                         show_success_message(f"✅ Loaded {len(df_raw)} rows")
                     except Exception as e:
@@ -2162,127 +2862,63 @@ def render_categorisation():
                 
                 cols = ["(blank)"] + list(df_raw.columns)
                 
-                # FIX: Using st.columns instead of grid system
-                map_cols = st.columns(5)
-                
-                with map_cols[0]:
-                    st.markdown('<p class="label">Date *</p>', unsafe_allow_html=True)
-                    map_date = st.selectbox("Date", cols, index=cols.index("Date") if "Date" in cols else 0, label_visibility="collapsed", key="map_date")
-                
-                with map_cols[1]:
-                    st.markdown('<p class="label">Description *</p>', unsafe_allow_html=True)
-                    map_desc = st.selectbox("Description", cols, index=cols.index("Description") if "Description" in cols else 0, label_visibility="collapsed", key="map_desc")
-                
-                with map_cols[2]:
-                    st.markdown('<p class="label">Debit (Dr)</p>', unsafe_allow_html=True)
-                    map_dr = st.selectbox("Debit", cols, index=cols.index("Dr") if "Dr" in cols else 0, label_visibility="collapsed", key="map_dr")
-                
-                with map_cols[3]:
-                    st.markdown('<p class="label">Credit (Cr)</p>', unsafe_allow_html=True)
-                    map_cr = st.selectbox("Credit", cols, index=cols.index("Cr") if "Cr" in cols else 0, label_visibility="collapsed", key="map_cr")
-                
-                with map_cols[4]:
-                    st.markdown('<p class="label">Closing Balance</p>', unsafe_allow_html=True)
-                    map_bal = st.selectbox("Closing", cols, index=cols.index("Closing") if "Closing" in cols else 0, label_visibility="collapsed", key="map_bal")
-                
-                # Date parsing function
-                def _to_date(x):
-                    if pd.isna(x):
-                        return None
-                    try:
-                        if isinstance(x, str):
-                            x_str = str(x).strip()
-                            formats_to_try = [
-                                "%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d", "%Y/%m/%d",
-                                "%d %b %Y", "%d %B %Y"
-                            ]
-                            for fmt in formats_to_try:
-                                try:
-                                    return dt.datetime.strptime(x_str, fmt).date()
-                                except:
-                                    continue
-                            try:
-                                return pd.to_datetime(x_str, dayfirst=True).date()
-                            except:
-                                return None
-                        if isinstance(x, (dt.datetime, dt.date)):
-                            return x.date() if isinstance(x, dt.datetime) else x
-                        return None
-                    except Exception:
-                        return None
+                with st.form("column_mapping_form"):
+                    # FIX: Using st.columns instead of grid system
+                    map_cols = st.columns(5)
+                    
+                    with map_cols[0]:
+                        st.markdown('<p class="label">Date *</p>', unsafe_allow_html=True)
+                        map_date = st.selectbox("Date", cols, index=cols.index("Date") if "Date" in cols else 0, label_visibility="collapsed", key="map_date")
+                    
+                    with map_cols[1]:
+                        st.markdown('<p class="label">Description *</p>', unsafe_allow_html=True)
+                        map_desc = st.selectbox("Description", cols, index=cols.index("Description") if "Description" in cols else 0, label_visibility="collapsed", key="map_desc")
+                    
+                    with map_cols[2]:
+                        st.markdown('<p class="label">Debit (Dr)</p>', unsafe_allow_html=True)
+                        map_dr = st.selectbox("Debit", cols, index=cols.index("Dr") if "Dr" in cols else 0, label_visibility="collapsed", key="map_dr")
+                    
+                    with map_cols[3]:
+                        st.markdown('<p class="label">Credit (Cr)</p>', unsafe_allow_html=True)
+                        map_cr = st.selectbox("Credit", cols, index=cols.index("Cr") if "Cr" in cols else 0, label_visibility="collapsed", key="map_cr")
+                    
+                    with map_cols[4]:
+                        st.markdown('<p class="label">Closing Balance</p>', unsafe_allow_html=True)
+                        map_bal = st.selectbox("Closing", cols, index=cols.index("Closing") if "Closing" in cols else 0, label_visibility="collapsed", key="map_bal")
+                    
+                    col1, col2 = st.columns([1, 4])
+                    with col1:
+                        apply_mapping = st.form_submit_button("Apply Mapping", type="primary", use_container_width=True)
                 
-                # Process rows button
-                col1, col2 = st.columns([1, 4])
-                with col1:
-                    if st.button("Apply Mapping", type="primary", key="apply_mapping", use_container_width=True):
-                        standardized_rows = []
-                        dropped_missing_date = 0
-                        dropped_missing_desc = 0
-                        date_errors = []
-                        
-                        for idx, r in df_raw.iterrows():
-                            d = _to_date(r[map_date]) if map_date != "(blank)" else None
-                            ds = str(r[map_desc]).strip() if map_desc != "(blank)" else ""
-                            
-                            if not d:
-                                if ds:
-                                    d = dt.date(year, month_names.index(month) + 1, 1)
-                                    dropped_missing_date += 1
-                                else:
-                                    dropped_missing_desc += 1
-                                    continue
-                            
-                            if not ds:
-                                dropped_missing_desc += 1
-                                continue
-                            
-                            try:
-                                drv = pd.to_numeric(r[map_dr], errors="coerce") if map_dr != "(blank)" else 0
-                                crv = pd.to_numeric(r[map_cr], errors="coerce") if map_cr != "(blank)" else 0
-                                bal = pd.to_numeric(r[map_bal], errors="coerce") if map_bal != "(blank)" else None
-                                
-                                standardized_rows.append({
-                                    "tx_date": d,
-                                    "description": ds,
-                                    "debit": round(float(drv or 0.0), 2),
-                                    "credit": round(float(crv or 0.0), 2),
-                                    "balance": float(bal) if bal is not None else None,
-                                })
-                            except Exception as e:
-                                date_errors.append(f"Row {idx+1}: {str(e)}")
-                                continue
-                        
-                        st.session_state.standardized_rows = standardized_rows
-                        st.session_state.column_mapping = {
-                            "date": map_date,
-                            "description": map_desc,
-                            "debit": map_dr,
-                            "credit": map_cr,
-                            "balance": map_bal
-                        }
-                        
-                        show_success_message(f"✅ Mapped {len(standardized_rows)} rows")
-                        
-                        if date_errors:
-                            show_warning_message(f"⚠️ {len(date_errors)} rows had date parsing issues")
-                        
-                        st.info(f"""
-                        **Mapping Summary:**
-                        - Original rows: {len(df_raw)}
-                        - Successfully mapped: {len(standardized_rows)}
-                        - Rows with missing/invalid date (used period default): {dropped_missing_date}
-                        - Rows dropped (missing description): {dropped_missing_desc}
-                        """)
-                        
-                        st.session_state.categorisation_selected_item = None
-                        st.rerun()
-            
-            st.markdown('</div>', unsafe_allow_html=True)
+                if apply_mapping:
+                    std, dropped_missing_desc, dropped_missing_date = _standardize_statement(
+                        df_raw, (map_date, map_desc, map_dr, map_cr, map_bal), dt.date(year, month_idx, 1)
+                    )
+                    
+                    st.session_state.standardized_df = std
+                    st.session_state.column_mapping = {
+                        "date": map_date,
+                        "description": map_desc,
+                        "debit": map_dr,
+                        "credit": map_cr,
+                        "balance": map_bal
+                    }
+                    
+                    show_success_message(f"✅ Mapped {len(std)} rows")
+                    
+                    st.info(f"""
+                    **Mapping Summary:**
+                    - Original rows: {len(df_raw)}
+                    - Successfully mapped: {len(std)}
+                    - Rows with missing/invalid date (used period default): {dropped_missing_date}
+                    - Rows dropped (missing description): {dropped_missing_desc}
+                    """)
+                    
+                    st.session_state.categorisation_selected_item = None
+                    st.rerun()
 
     # --- Step 4: Saved Items Display ---
-    with st.container():
-        st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-        
+    with _card():
         st.markdown("### 4. Saved Items")
         st.markdown('<p class="caption">Select a draft or committed dataset to work with</p>', unsafe_allow_html=True)
         
@@ -2339,371 +2975,96 @@ def render_categorisation():
         if saved_items:
             selected_item_id = st.session_state.categorisation_selected_item
             
+            rows_html = []
             for item in saved_items:
-                is_selected = (selected_item_id == item["id"])
-                
-                col1, col2, col3 = st.columns([2, 4, 2])
-                with col1:
-                    st.markdown(f"**{item['type']}**")
-                    st.markdown(f'<p class="caption">{item["row_count"]} rows</p>', unsafe_allow_html=True)
-                with col2:
-                    st.markdown(f'<span class="status-badge {item["badge_class"]}">{item["status"]}</span>', unsafe_allow_html=True)
-                    if item.get("min_date") and item.get("max_date"):
-                        st.markdown(f'<p class="caption">{item["min_date"]} to {item["max_date"]}</p>', unsafe_allow_html=True)
-                with col3:
-                    if is_selected:
-                        if st.button("✖ Deselect", key=f"deselect_{item['id']}", type="secondary", use_container_width=True):
+                esc = {k: html.escape(str(v)) for k, v in item.items() if v is not None}
+                date_range = ""
+                if item.get("min_date") and item.get("max_date"):
+                    date_range = f'<span class="caption">{esc["min_date"]} to {esc["max_date"]}</span>'
+                rows_html.append(
+                    f'<div class="saved-row"><div><strong>{esc["type"]}</strong>'
+                    f'<p class="caption">{esc["row_count"]} rows</p></div>'
+                    f'<span class="status-badge {esc["badge_class"]}">{esc["status"]}</span>{date_range}</div>'
+                )
+            st.markdown("".join(rows_html), unsafe_allow_html=True)
+            
+            for col, item in zip(st.columns(len(saved_items)), saved_items):
+                with col:
+                    if selected_item_id == item["id"]:
+                        if st.button(f"✖ Deselect {item['type']}", key=f"deselect_{item['id']}", type="secondary", use_container_width=True):
                             st.session_state.categorisation_selected_item = None
                             st.rerun()
                     else:
-                        if st.button("👉 Select", key=f"select_{item['id']}", type="primary", use_container_width=True):
+                        if st.button(f"👉 Select {item['type']}", key=f"select_{item['id']}", type="primary", use_container_width=True):
                             st.session_state.categorisation_selected_item = item["id"]
                             st.rerun()
-                
-                if not is_selected:
-                    st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
         else:
             st.markdown('<div class="empty-state">', unsafe_allow_html=True)
             st.markdown('<div class="empty-state-icon">📄</div>', unsafe_allow_html=True)
             st.markdown("### No Saved Items")
             st.markdown('<p class="body">Upload a statement or select a period with existing data.</p>', unsafe_allow_html=True)
             st.markdown('</div>', unsafe_allow_html=True)
-        
-        st.markdown('</div>', unsafe_allow_html=True)
 
-    # --- Check if item is selected ---
-    selected_item_id = st.session_state.categorisation_selected_item
-    has_selected_item = bool(selected_item_id)
-    
-    # --- Step 5: Main View Table ---
-    if has_selected_item:
-        with st.container():
-            st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-            
-            st.markdown("### 5. Transaction Review")
-            st.markdown('<p class="caption">Review and edit transaction categorizations</p>', unsafe_allow_html=True)
-            
-            if selected_item_id and selected_item_id.startswith("draft_"):
-                try:
-                    draft_rows = crud.load_draft_rows(client_id, bank_id, period)
-                    if draft_rows:
-                        df_d = pd.DataFrame(draft_rows)
-                        
-                        categories = cached_categories(client_id)
-                        category_names = []
-                        
-                        for c in categories:
-                            if c.get("is_active", True):
-                                cat_name = c.get("category_name", "")
-                                category_names.append(cat_name)
-                        
-                        edited_df = st.data_editor(
-                            df_d,
-                            column_config={
-                                "id": st.column_config.NumberColumn("ID", disabled=True),
-                                "tx_date": st.column_config.DateColumn("Date", disabled=True),
-                                "description": st.column_config.TextColumn("Description", disabled=True),
-                                "debit": st.column_config.NumberColumn("Debit", format="%.2f", disabled=True),
-                                "credit": st.column_config.NumberColumn("Credit", format="%.2f", disabled=True),
-                                "balance": st.column_config.NumberColumn("Balance", format="%.2f", disabled=True),
-                                "suggested_category": st.column_config.TextColumn("AI Category", disabled=True),
-                                "suggested_vendor": st.column_config.TextColumn("AI Vendor", disabled=True),
-                                "confidence": st.column_config.NumberColumn("Confidence", format="%.1f%%", disabled=True),
-                                "final_category": st.column_config.SelectboxColumn(
-                                    "Final Category",
-                                    options=category_names,
-                                    required=False
-                                ),
-                                "final_vendor": st.column_config.TextColumn(
-                                    "Final Vendor",
-                                    required=False
-                                ),
-                            },
-                            column_order=[
-                                "tx_date", "description", "debit", "credit", 
-                                "suggested_category", "suggested_vendor", "confidence",
-                                "final_category", "final_vendor"
-                            ],
-                            use_container_width=True,
-                            hide_index=True,
-                            key="draft_editor"
-                        )
-                        
-                        if "draft_editor" in st.session_state:
-                            edited_data = st.session_state.draft_editor.get("edited_rows", {})
-                            if edited_data:
-                                for row_idx in edited_data.keys():
-                                    st.session_state.last_edited_row = int(row_idx)
-                                    st.session_state.last_edit_time = time.time()
-                        
-                    else:
-                        st.info("No draft rows found.")
-                except Exception as e:
-                    show_error_message(f"Unable to load draft rows: {_format_exc(e)}")
-            
-            elif selected_item_id and selected_item_id.startswith("committed"):
-                try:
-                    committed_rows = crud.load_committed_rows(client_id, bank_id, period)
-                    if committed_rows:
-                        df_c = pd.DataFrame(committed_rows)
-                        st.dataframe(df_c, use_container_width=True, hide_index=True)
-                    else:
-                        st.info("No committed rows found.")
-                except Exception as e:
-                    show_error_message(f"Unable to load committed rows: {_format_exc(e)}")
-            
-            st.markdown('</div>', unsafe_allow_html=True)
-    
-    # --- Step 6: Progress Summary ---
-    if has_selected_item and draft_summary and selected_item_id.startswith("draft_"):
-        with st.container():
-            st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-            
-            st.markdown("### 6. Progress Summary")
-            st.markdown('<p class="caption">Track your categorization progress</p>', unsafe_allow_html=True)
-            
-            total_rows = int(draft_summary.get("row_count") or 0)
-            suggested_count = 0
-            if draft_summary:
-                suggested_count = int(draft_summary.get("suggested_count") or 0)
-            final_count = int(draft_summary.get("final_count") or 0)
-            pending_rows = total_rows - final_count
-            
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                st.metric("Total Rows", total_rows)
-            
-            with col2:
-                suggested_pct = (suggested_count / total_rows * 100) if total_rows > 0 else 0
-                st.metric("AI Suggested", suggested_count, f"{suggested_pct:.1f}%")
-            
-            with col3:
-                final_pct = (final_count / total_rows * 100) if total_rows > 0 else 0
-                st.metric("User Finalised", final_count, f"{final_pct:.1f}%")
-            
-            with col4:
-                pending_pct = (pending_rows / total_rows * 100) if total_rows > 0 else 0
-                delta_color = "inverse" if pending_rows > 0 else "normal"
-                st.metric("Pending Review", pending_rows, f"{pending_pct:.1f}%", delta_color=delta_color)
-            
-            st.markdown('</div>', unsafe_allow_html=True)
-    
-    # --- Step 7: Action Buttons ---
-    if has_selected_item:
-        with st.container():
-            st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-            
-            st.markdown("### 7. Actions")
-            st.markdown('<p class="caption">Available actions for the selected dataset</p>', unsafe_allow_html=True)
-            
-            has_draft = bool(draft_summary)
-            has_commit = bool(commit_summary)
-            
-            if selected_item_id.startswith("draft_"):
-                suggested_count = 0
-                if draft_summary:
-                    suggested_count = int(draft_summary.get("suggested_count") or 0)
-                final_count = int(draft_summary.get("final_count") or 0)
-                total_rows = int(draft_summary.get("row_count") or 0)
-                
-                action_cols = st.columns(3)
-                
-                with action_cols[0]:
-                    if suggested_count == 0:
-                        if st.button("🤖 Suggest Categories", type="primary", use_container_width=True, 
-                                   disabled=st.session_state.processing_suggestions):
-                            if not st.session_state.processing_suggestions:
-                                st.session_state.processing_suggestions = True
-                                
-                                with st.spinner("😺 Cat is analyzing transactions..."):
-                                    try:
-                                        n = crud.process_suggestions(client_id, bank_id, period, 
-                                                                    bank_account_type=bank_obj.get("account_type"))
-                                        
-                                        show_success_message(f"✅ Suggested {n} categories!")
-                                        
-                                        cache_data.clear()
-                                        st.session_state.processing_suggestions = False
-                                        st.rerun()
-                                    except Exception as e:
-                                        show_error_message(f"❌ Suggestion failed: {_format_exc(e)}")
-                                        st.session_state.processing_suggestions = False
-                    else:
-                        if st.button("🔄 Re-suggest Categories", type="secondary", use_container_width=True,
-                                   disabled=st.session_state.processing_suggestions):
-                            show_info_message("Already suggested. Edit categories in the table above.")
-                
-                with action_cols[1]:
-                    if st.button("💾 Save Draft Changes", type="primary", use_container_width=True, key="save_draft_changes"):
-                        if "draft_editor" in st.session_state and st.session_state.draft_editor:
-                            edited_data = st.session_state.draft_editor.get("edited_rows", {})
-                            
-                            if edited_data:
-                                with st.spinner("😺 Cat is saving your changes..."):
-                                    rows_to_save = []
-                                    for row_idx, changes in edited_data.items():
-                                        row_idx = int(row_idx)
-                                        if row_idx < len(draft_rows):
-                                            original_row = draft_rows[row_idx]
-                                            final_cat = changes.get("final_category")
-                                            final_ven = changes.get("final_vendor")
-                                            
-                                            if final_cat is None or final_cat == "":
-                                                final_cat = original_row.get("final_category", "")
-                                            if final_ven is None or final_ven == "":
-                                                final_ven = original_row.get("final_vendor", "")
-                                            
-                                            rows_to_save.append({
-                                                "id": original_row["id"],
-                                                "final_category": final_cat,
-                                                "final_vendor": final_ven
-                                            })
-                                    
-                                    if rows_to_save:
-                                        try:
-                                            updated = crud.save_review_changes(rows_to_save)
-                                            show_success_message(f"✅ Saved {updated} changes!")
-                                            cache_data.clear()
-                                            st.rerun()
-                                        except Exception as e:
-                                            show_error_message(f"❌ Save failed: {_format_exc(e)}")
-                                    else:
-                                        show_warning_message("No valid changes to save")
-                            else:
-                                show_info_message("No changes detected to save. Make edits in the table first.")
-                        else:
-                            show_info_message("Make changes in the table above first, then save.")
-                
-                with action_cols[2]:
-                    if final_count >= total_rows and total_rows > 0:
-                        # COMMIT SECTION
-                        if st.button("🔒 Commit Final Now", type="primary", use_container_width=True,
-                                   disabled=st.session_state.processing_commit, key="commit_final_button"):
-                            
-                            if not st.session_state.processing_commit:
-                                st.session_state.processing_commit = True
-                                
-                                with st.spinner("😺 Cat is locking transactions..."):
-                                    try:
-                                        result = crud.commit_period(client_id, bank_id, period, 
-                                                                  committed_by="Accountant")
-                                        
-                                        if result.get("ok"):
-                                            show_success_message(f"✅ Successfully committed {result.get('rows', 0)} rows!")
-                                            st.balloons()
-                                            
-                                            # Clear states
-                                            st.session_state.categorisation_selected_item = None
-                                            st.session_state.standardized_rows = []
-                                            st.session_state.df_raw = None
-                                            st.session_state.processing_commit = False
-                                            cache_data.clear()
-                                            
-                                            # Wait and refresh
-                                            time.sleep(2)
-                                            st.rerun()
-                                        else:
-                                            show_error_message(f"❌ Commit failed: {result.get('msg', 'Unknown error')}")
-                                            st.session_state.processing_commit = False
-                                    except Exception as e:
-                                        show_error_message(f"❌ Commit error: {_format_exc(e)}")
-                                        st.session_state.processing_commit = False
-                    else:
-                        pending = total_rows - final_count
-                        st.info(f"📝 **Finalise {pending} more rows to commit**")
-            
-            elif selected_item_id.startswith("committed"):
-                st.success("✅ **Committed & Locked** - This data is now available in Reports")
-                
-                commit_info = crud.list_commit_metrics(
-                    client_id=client_id,
-                    bank_id=bank_id,
-                    period=period,
-                    date_from=date_from,
-                    date_to=date_to
-                )
-                
-                if commit_info:
-                    info = commit_info[0]
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.metric("Rows Committed", info.get("rows_committed", 0))
-                    with col2:
-                        st.metric("Accuracy", f"{info.get('accuracy', 0)*100:.1f}%")
-                    with col3:
-                        st.metric("Committed By", info.get("committed_by", "N/A"))
-            
-            st.markdown('</div>', unsafe_allow_html=True)
+    # --- Steps 5-7: Review and actions for the selected item ---
+    if st.session_state.categorisation_selected_item:
+        _render_review_and_actions(client_id, bank_id, period, bank_obj, date_from, date_to)
     
     # --- Show special message for upload state ---
-    elif not has_selected_item and not draft_summary and not commit_summary:
-        if st.session_state.standardized_rows and len(st.session_state.standardized_rows) > 0:
-            with st.container():
-                st.markdown('<div class="professional-card">', unsafe_allow_html=True)
-                
+    elif not draft_summary and not commit_summary:
+        df_uploaded = st.session_state.standardized_df
+        if df_uploaded is not None and len(df_uploaded) > 0:
+            with _card():
                 st.markdown("### 5. Mapped Data Preview")
                 st.markdown('<p class="caption">Review mapped data before saving as draft</p>', unsafe_allow_html=True)
                 
-                df_uploaded = pd.DataFrame(st.session_state.standardized_rows)
                 st.info(f"📄 **Mapped Data ({len(df_uploaded)} rows)** - Ready to save as draft")
-                st.dataframe(df_uploaded, use_container_width=True, hide_index=True)
+                st.dataframe(df_uploaded.head(_PREVIEW_ROWS), use_container_width=True, hide_index=True, height=400)
+                if len(df_uploaded) > _PREVIEW_ROWS:
+                    st.caption(f"Showing the first {_PREVIEW_ROWS} of {len(df_uploaded)} rows")
+                    st.download_button(
+                        "📥 Download All Mapped Rows",
+                        data=_standardized_csv_bytes(df_uploaded),
+                        file_name=f"mapped_{period}.csv",
+                        mime="text/csv",
+                        type="secondary"
+                    )
                 
                 st.markdown("### 6. Save Draft")
                 if st.button("💾 Save Draft", type="primary", use_container_width=True):
                     with st.spinner("😺 Cat is saving draft..."):
                         try:
-                            n = crud.insert_draft_rows(client_id, bank_id, period, 
-                                                      st.session_state.standardized_rows, replace=True)
+                            total = len(df_uploaded)
+                            progress = st.progress(0.0, text="Saving draft...")
+                            n = crud.bulk_insert_draft_rows(
+                                client_id, bank_id, period, df_uploaded,
+                                batch_size=_DRAFT_BATCH_SIZE,
+                                on_progress=lambda done: progress.progress(done / total, text=f"Saved {done} of {total} rows"),
+                            )
                             show_success_message(f"✅ Draft saved ({n} rows)!")
-                            
-                            st.session_state.standardized_rows = []
-                            st.session_state.df_raw = None
-                            cache_data.clear()
-                            st.rerun()
+                            _finish_write_cycle()
                         except Exception as e:
                             show_error_message(f"❌ Save failed: {_format_exc(e)}")
-                
-                st.markdown('</div>', unsafe_allow_html=True)
 
 # ---------------- Main Page Router ----------------
+_PAGES = {
+    "Home": render_home,
+    "Dashboard": render_dashboard,
+    "Reports": render_reports,
+    "Companies": render_companies,
+    "Setup": render_setup,
+    "Categorisation": render_categorisation,
+    "Settings": render_settings,
+}
+
+
 def main():
     page = st.session_state.active_page
     
     st.markdown('<div class="fade-in-content">', unsafe_allow_html=True)
     
-    if page == "Home":
-        render_home()
-    elif page == "Dashboard":
-        render_dashboard()
-    elif page == "Reports":
-        render_reports()
-    elif page == "Companies":
-        render_companies()
-    elif page == "Setup":
-        render_setup()
-    elif page == "Categorisation":
-        render_categorisation()
-    elif page == "Settings":
-        render_settings()
-    else:
-        render_home()
+    _PAGES.get(page, render_home)()
     
     st.markdown('</div>', unsafe_allow_html=True)
-    
-    # Highlight recently edited row (if any)
-    if (st.session_state.last_edited_row is not None and 
-        time.time() - st.session_state.last_edit_time < 1.5):
-        st.markdown(f"""
-        <script>
-        setTimeout(function() {{
-            var rows = document.querySelectorAll('[data-testid="stDataFrame"] tbody tr');
-            if (rows.length > {st.session_state.last_edited_row}) {{
-                rows[{st.session_state.last_edited_row}].classList.add('highlight-row');
-            }}
-        }}, 100);
-        </script>
-        """, unsafe_allow_html=True)
 
 if __name__ == "__main__":
     main()
@@ -1,6 +1,8 @@
 # src/crud.py
+import io
 import re
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import pandas as pd
 from sqlalchemy import create_engine, text
 import streamlit as st
 
@@ -10,7 +12,7 @@ def get_engine():
     db_url = st.secrets.get("DATABASE_URL") or st.secrets.get("db_url") or st.secrets.get("DB_URL")
     if not db_url:
         raise RuntimeError("DATABASE_URL missing in Streamlit secrets.")
-    return create_engine(db_url, pool_pre_ping=True)
+    return create_engine(db_url, pool_pre_ping=True, pool_size=10, max_overflow=5)
 
 
 def _q(sql: str, params: Optional[dict] = None) -> List[dict]:
@@ -24,6 +26,12 @@ def _q(sql: str, params: Optional[dict] = None) -> List[dict]:
         return []
 
 
+def _q_df(sql: str, params: Optional[dict] = None, dtype: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    engine = get_engine()
+    with engine.connect() as conn:
+        return pd.read_sql(text(sql), conn, params=params or {}, dtype=dtype)
+
+
 def _exec(sql: str, params: Optional[dict] = None) -> int:
     engine = get_engine()
     with engine.begin() as conn:
@@ -31,6 +39,16 @@ def _exec(sql: str, params: Optional[dict] = None) -> int:
         return res.rowcount if res.rowcount is not None else 0
 
 
+def _exec_many(sql: str, rows: List[dict]) -> int:
+    """Run one statement for every parameter set in a single transaction (executemany)"""
+    if not rows:
+        return 0
+    engine = get_engine()
+    with engine.begin() as conn:
+        conn.execute(text(sql), rows)
+    return len(rows)
+
+
 # ---------------- Clients ----------------
 def list_clients(include_inactive: bool = False) -> List[dict]:
     if include_inactive:
@@ -38,6 +56,11 @@ def list_clients(include_inactive: bool = False) -> List[dict]:
     return _q("SELECT * FROM clients WHERE is_active = TRUE ORDER BY created_at DESC;")
 
 
+def get_client(client_id: int) -> Optional[dict]:
+    rows = _q("SELECT * FROM clients WHERE id=:id;", {"id": client_id})
+    return rows[0] if rows else None
+
+
 def create_client(name: str, industry: str, country: str, business_description: str = "") -> int:
     rows = _q("""
         INSERT INTO clients(name, industry, country, business_description)
@@ -62,6 +85,13 @@ def set_client_active(client_id: int, is_active: bool) -> None:
     _exec("UPDATE clients SET is_active=:a WHERE id=:id;", {"a": is_active, "id": client_id})
 
 
+def set_clients_active(client_ids: List[int], is_active: bool) -> int:
+    ids = [int(i) for i in client_ids]
+    if not ids:
+        return 0
+    return _exec("UPDATE clients SET is_active=:a WHERE id = ANY(:ids);", {"a": is_active, "ids": ids})
+
+
 # ---------------- Banks ----------------
 def list_banks(client_id: int, include_inactive: bool = False) -> List[dict]:
     if include_inactive:
@@ -69,6 +99,11 @@ def list_banks(client_id: int, include_inactive: bool = False) -> List[dict]:
     return _q("SELECT * FROM banks WHERE client_id=:cid AND is_active=TRUE ORDER BY created_at DESC;", {"cid": client_id})
 
 
+def get_bank(bank_id: int) -> Optional[dict]:
+    rows = _q("SELECT * FROM banks WHERE id=:id;", {"id": bank_id})
+    return rows[0] if rows else None
+
+
 def add_bank(client_id: int, bank_name: str, account_type: str, currency: str = "", masked: str = "", opening_balance: Optional[float] = None) -> int:
     rows = _q("""
         INSERT INTO banks(client_id, bank_name, account_type, currency, account_masked, opening_balance)
@@ -82,6 +117,13 @@ def set_bank_active(bank_id: int, is_active: bool):
     _exec("UPDATE banks SET is_active=:a WHERE id=:id;", {"a": is_active, "id": bank_id})
 
 
+def set_banks_active(bank_ids: List[int], is_active: bool) -> int:
+    ids = [int(i) for i in bank_ids]
+    if not ids:
+        return 0
+    return _exec("UPDATE banks SET is_active=:a WHERE id = ANY(:ids);", {"a": is_active, "ids": ids})
+
+
 def update_bank(
     bank_id: int,
     bank_name: str,
@@ -115,6 +157,23 @@ def bank_has_transactions(bank_id: int) -> bool:
     return bool(rows)
 
 
+def banks_with_transactions(bank_ids: List[int]) -> List[int]:
+    """The given banks that have draft or committed transactions, in one query"""
+    ids = [int(i) for i in bank_ids]
+    if not ids:
+        return []
+    rows = _q("""
+        SELECT DISTINCT bank_id
+        FROM transactions_draft
+        WHERE bank_id = ANY(:ids)
+        UNION
+        SELECT DISTINCT bank_id
+        FROM transactions_committed
+        WHERE bank_id = ANY(:ids);
+    """, {"ids": ids})
+    return sorted(int(r["bank_id"]) for r in rows)
+
+
 # ---------------- Categories ----------------
 def list_categories(client_id: int, include_inactive: bool = False) -> List[dict]:
     if include_inactive:
@@ -174,6 +233,24 @@ def list_table_columns(table_name: str) -> List[str]:
     return [r["column_name"] for r in rows]
 
 
+def list_columns_by_table() -> Dict[str, List[str]]:
+    """Column names of every public base table, in one round trip"""
+    rows = _q("""
+        SELECT t.table_name, c.column_name
+        FROM information_schema.tables t
+        LEFT JOIN information_schema.columns c
+          ON c.table_schema = t.table_schema AND c.table_name = t.table_name
+        WHERE t.table_schema='public' AND t.table_type='BASE TABLE'
+        ORDER BY t.table_name, c.ordinal_position;
+    """)
+    columns: Dict[str, List[str]] = {}
+    for r in rows:
+        cols = columns.setdefault(r["table_name"], [])
+        if r["column_name"] is not None:
+            cols.append(r["column_name"])
+    return columns
+
+
 def list_tables() -> List[str]:
     rows = _q("""
         SELECT table_name
@@ -194,6 +271,17 @@ def update_category(cat_id: int, name: str, typ: str, nature: str) -> None:
     """, {"cn": name.strip(), "t": typ, "n": nature, "id": cat_id})
 
 
+def update_category_full(cat_id: int, name: str, typ: str, nature: str, is_active: bool) -> None:
+    _exec("""
+        UPDATE categories
+        SET category_name=:cn,
+            type=:t,
+            nature=:n,
+            is_active=:a
+        WHERE id=:id;
+    """, {"cn": name.strip(), "t": typ, "n": nature, "a": is_active, "id": cat_id})
+
+
 # ---------------- Vendor memory + Keyword model ----------------
 def _normalize_vendor_key(vendor: str) -> str:
     return (vendor or "").strip().lower()
@@ -250,7 +338,21 @@ def keyword_weights(client_id: int) -> List[dict]:
 
 
 # ---------------- Drafts ----------------
-def drafts_summary(client_id: int, bank_id: int) -> List[dict]:
+def drafts_summary(client_id: int, bank_id: Optional[int]) -> List[dict]:
+    """Draft periods of one bank, or of every bank of the client when bank_id is None"""
+    if bank_id is None:
+        return _q("""
+            SELECT bank_id,
+                   period,
+                   COUNT(*) AS row_count,
+                   MIN(tx_date) AS min_date,
+                   MAX(tx_date) AS max_date,
+                   MAX(created_at) AS last_saved
+            FROM transactions_draft
+            WHERE client_id=:cid
+            GROUP BY bank_id, period
+            ORDER BY period DESC, bank_id;
+        """, {"cid": client_id})
     return _q("""
         SELECT period,
                COUNT(*) AS row_count,
@@ -325,19 +427,98 @@ def insert_draft_rows(client_id: int, bank_id: int, period: str, rows: List[dict
     return n
 
 
+_DRAFT_INSERT_COLUMNS = ("client_id", "bank_id", "period", "tx_date", "description", "debit", "credit", "balance")
+
+
+def bulk_insert_draft_rows(
+    client_id: int,
+    bank_id: int,
+    period: str,
+    df: pd.DataFrame,
+    replace: bool = True,
+    batch_size: int = 10000,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """Insert a standardized draft frame in one transaction (COPY on Postgres, multi-row INSERT elsewhere).
+    
+    Rows go in batch_size chunks; on_progress receives the running row count after each chunk.
+    """
+    out = df.assign(
+        client_id=client_id, bank_id=bank_id, period=period,
+        debit=df["debit"].fillna(0), credit=df["credit"].fillna(0),
+    ).loc[:, list(_DRAFT_INSERT_COLUMNS)]
+    delete_sql = "DELETE FROM transactions_draft WHERE client_id=:cid AND bank_id=:bid AND period=:p;"
+    params = {"cid": client_id, "bid": bank_id, "p": period}
+    engine = get_engine()
+    total = 0
+
+    if engine.dialect.name != "postgresql":
+        with engine.begin() as conn:
+            if replace:
+                conn.execute(text(delete_sql), params)
+            for start in range(0, len(out), batch_size):
+                chunk = out.iloc[start:start + batch_size]
+                chunk.to_sql("transactions_draft", conn, if_exists="append", index=False, method="multi", chunksize=1000)
+                total += len(chunk)
+                if on_progress:
+                    on_progress(total)
+        return total
+
+    copy_sql = f"COPY transactions_draft({', '.join(_DRAFT_INSERT_COLUMNS)}) FROM STDIN WITH CSV"
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cur:
+            if replace:
+                cur.execute(
+                    "DELETE FROM transactions_draft WHERE client_id=%s AND bank_id=%s AND period=%s;",
+                    (client_id, bank_id, period),
+                )
+            for start in range(0, len(out), batch_size):
+                chunk = out.iloc[start:start + batch_size]
+                buf = io.StringIO()
+                chunk.to_csv(buf, index=False, header=False)
+                buf.seek(0)
+                cur.copy_expert(copy_sql, buf)
+                total += len(chunk)
+                if on_progress:
+                    on_progress(total)
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+    return total
+
+
+_LOAD_DRAFT_SQL = """
+    SELECT *
+    FROM transactions_draft
+    WHERE client_id=:cid AND bank_id=:bid AND period=:p
+    ORDER BY tx_date ASC, id ASC;
+"""
+_LOAD_COMMITTED_SQL = """
+    SELECT *
+    FROM transactions_committed
+    WHERE client_id=:cid AND bank_id=:bid AND period=:p
+    ORDER BY tx_date ASC, id ASC;
+"""
+_ROW_FRAME_DTYPES = {"debit": "float64", "credit": "float64", "balance": "float64", "confidence": "float64"}
+
+
 def load_draft(client_id: int, bank_id: int, period: str) -> List[dict]:
-    return _q("""
-        SELECT *
-        FROM transactions_draft
-        WHERE client_id=:cid AND bank_id=:bid AND period=:p
-        ORDER BY tx_date ASC, id ASC;
-    """, {"cid": client_id, "bid": bank_id, "p": period})
+    return _q(_LOAD_DRAFT_SQL, {"cid": client_id, "bid": bank_id, "p": period})
 
 
 def load_draft_rows(client_id: int, bank_id: int, period: str) -> List[dict]:
     return load_draft(client_id, bank_id, period)
 
 
+def load_draft_df(client_id: int, bank_id: int, period: str) -> pd.DataFrame:
+    """Draft rows read column-wise into a frame, without a dict per row"""
+    return _q_df(_LOAD_DRAFT_SQL, {"cid": client_id, "bid": bank_id, "p": period}, dtype=_ROW_FRAME_DTYPES)
+
+
 def get_commit_summary(client_id: int, bank_id: int, period: str) -> Optional[dict]:
     rows = _q("""
         SELECT c.id AS commit_id,
@@ -356,32 +537,41 @@ def get_commit_summary(client_id: int, bank_id: int, period: str) -> Optional[di
 
 
 def load_committed_rows(client_id: int, bank_id: int, period: str) -> List[dict]:
-    return _q("""
-        SELECT *
-        FROM transactions_committed
-        WHERE client_id=:cid AND bank_id=:bid AND period=:p
-        ORDER BY tx_date ASC, id ASC;
-    """, {"cid": client_id, "bid": bank_id, "p": period})
+    return _q(_LOAD_COMMITTED_SQL, {"cid": client_id, "bid": bank_id, "p": period})
+
+
+def load_committed_df(client_id: int, bank_id: int, period: str) -> pd.DataFrame:
+    """Committed rows read column-wise into a frame, without a dict per row"""
+    return _q_df(_LOAD_COMMITTED_SQL, {"cid": client_id, "bid": bank_id, "p": period}, dtype=_ROW_FRAME_DTYPES)
 
 
 def save_review_changes(rows: List[dict]) -> int:
-    updated = 0
-    for r in rows:
-        _exec("""
-            UPDATE transactions_draft
-            SET final_category=:c,
-                final_vendor=:v,
-                status='USER_FINALISED'
-            WHERE id=:id;
-        """, {"c": r.get("final_category"), "v": r.get("final_vendor"), "id": r["id"]})
-        updated += 1
-    return updated
+    """Apply reviewed final category/vendor values with a single UPDATE ... FROM (VALUES ...)"""
+    if not rows:
+        return 0
+    values, params = [], {}
+    for i, r in enumerate(rows):
+        values.append(f"(:id{i}, CAST(:c{i} AS TEXT), CAST(:v{i} AS TEXT))")
+        params[f"id{i}"] = int(r["id"])
+        params[f"c{i}"] = r.get("final_category")
+        params[f"v{i}"] = r.get("final_vendor")
+    return _exec(f"""
+        UPDATE transactions_draft AS t
+        SET final_category=data.c,
+            final_vendor=data.v,
+            status='USER_FINALISED'
+        FROM (VALUES {', '.join(values)}) AS data(id, c, v)
+        WHERE t.id = data.id;
+    """, params)
 
 
 # ---------------- Suggestion Engine ----------------
+_NON_TOKEN_RE = re.compile(r"[^a-z0-9\s]")
+
+
 def _tokenize(desc: str) -> List[str]:
     desc = (desc or "").lower()
-    desc = re.sub(r"[^a-z0-9\s]", " ", desc)
+    desc = _NON_TOKEN_RE.sub(" ", desc)
     toks = [t for t in desc.split() if len(t) >= 3 and not t.isdigit()]
     return toks[:25]
 
@@ -398,23 +588,21 @@ def process_suggestions(client_id: int, bank_id: int, period: str, bank_account_
     from src import engine
     
     draft = load_draft(client_id, bank_id, period)
-    updated = 0
+    inputs = [
+        (row["description"] or "", float(row.get("debit") or 0), float(row.get("credit") or 0))
+        for row in draft
+    ]
+    # Vendor memory and keyword weights are normalized once for the whole period
+    suggestions = engine.suggest_batch(
+        inputs,
+        bank_account_type=bank_account_type,
+        categories=cats,
+        vendor_memory=list(vm.values()),
+        keyword_weights=kw,
+    )
+    updates = []
     
-    for row in draft:
-        desc = row["description"] or ""
-        debit = float(row.get("debit") or 0)
-        credit = float(row.get("credit") or 0)
-        
-        suggested_cat, suggested_vendor, confidence, reason = engine.suggest_one(
-            desc=desc,
-            debit=debit,
-            credit=credit,
-            bank_account_type=bank_account_type,
-            categories=cats,
-            vendor_memory=list(vm.values()),
-            keyword_weights=kw,
-        )
-        
+    for row, (_, debit, credit), (suggested_cat, suggested_vendor, confidence, reason) in zip(draft, inputs, suggestions):
         if not suggested_cat:
             if credit > 0 and debit == 0:
                 income_cats = [c for c in cats if c["type"] == "Income"]
@@ -427,24 +615,24 @@ def process_suggestions(client_id: int, bank_id: int, period: str, bank_account_
                 confidence = 0.45
                 reason = "Fallback: Debit → Expense"
         
-        _exec("""
-            UPDATE transactions_draft
-            SET suggested_category=:sc,
-                suggested_vendor=:sv,
-                confidence=:cf,
-                reason=:rs,
-                status='SYSTEM_SUGGESTED'
-            WHERE id=:id;
-        """, {
+        updates.append({
             "sc": suggested_cat,
             "sv": suggested_vendor,
             "cf": confidence,
             "rs": reason,
             "id": row["id"],
         })
-        updated += 1
     
-    return updated
+    # One prepared UPDATE for every row, in a single transaction
+    return _exec_many("""
+        UPDATE transactions_draft
+        SET suggested_category=:sc,
+            suggested_vendor=:sv,
+            confidence=:cf,
+            reason=:rs,
+            status='SYSTEM_SUGGESTED'
+        WHERE id=:id;
+    """, updates)
 
 # ---------------- Commit / Lock / Learn ----------------
 def committed_sample(client_id: int, bank_id: int, period: str, limit: int = 200) -> List[dict]:
@@ -459,181 +647,129 @@ def committed_sample(client_id: int, bank_id: int, period: str, limit: int = 200
 
 def commit_period(client_id: int, bank_id: int, period: str, committed_by: Optional[str] = None) -> dict:
     """
-    FAST AND WORKING COMMIT FUNCTION
+    Move a finalised draft period into transactions_committed in one transaction
     """
+    params = {"cid": client_id, "bid": bank_id, "p": period}
     try:
-        # 1. Load draft rows
-        draft_rows = load_draft(client_id, bank_id, period)
-        
-        if not draft_rows:
-            return {"ok": False, "msg": "No draft rows found for this bank+period."}
-        
-        total_rows = len(draft_rows)
-        
-        # 2. Check all rows have final_category
-        missing_rows = []
-        for idx, row in enumerate(draft_rows):
-            final_cat = (row.get("final_category") or "").strip()
-            if not final_cat:
-                missing_rows.append(idx + 1)
-        
-        if missing_rows:
-            return {"ok": False, "msg": f"Rows {missing_rows} missing Final Category."}
-        
-        # 3. Calculate accuracy (suggested vs final)
-        matched = 0
-        for row in draft_rows:
-            suggested = (row.get("suggested_category") or "").strip()
-            final = (row.get("final_category") or "").strip()
-            if suggested and final and suggested == final:
-                matched += 1
-        
-        accuracy = round(matched / total_rows, 4) if total_rows > 0 else 0
-        
-        # 4. Deactivate previous commits for same client+bank+period
-        try:
-            _exec("""
-                UPDATE commits 
-                SET is_active = FALSE 
+        engine = get_engine()
+        with engine.begin() as conn:
+            # 1. Load the columns needed for validation and learning; the row locks
+            #    make a concurrent commit of the same period wait for this one
+            draft_rows = conn.execute(text("""
+                SELECT description, suggested_category, final_category, final_vendor
+                FROM transactions_draft
+                WHERE client_id=:cid AND bank_id=:bid AND period=:p
+                ORDER BY tx_date ASC, id ASC
+                FOR UPDATE;
+            """), params).mappings().all()
+            
+            if not draft_rows:
+                # A repeated commit finds the draft already moved; report it as a no-op
+                commit_id = conn.execute(text("""
+                    SELECT id FROM commits
+                    WHERE client_id=:cid AND bank_id=:bid AND period=:p AND is_active=TRUE
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT 1;
+                """), params).scalar()
+                if commit_id is not None:
+                    return {"ok": True, "commit_id": commit_id, "rows": 0, "inserted": 0,
+                            "msg": "Period already committed"}
+                return {"ok": False, "msg": "No draft rows found for this bank+period."}
+            
+            total_rows = len(draft_rows)
+            
+            # 2. Check all rows have final_category
+            missing_rows = [idx + 1 for idx, row in enumerate(draft_rows) if not (row["final_category"] or "").strip()]
+            if missing_rows:
+                return {"ok": False, "msg": f"Rows {missing_rows} missing Final Category."}
+            
+            # 3. Calculate accuracy (suggested vs final)
+            matched = sum(
+                1 for row in draft_rows
+                if (row["suggested_category"] or "").strip()
+                and (row["suggested_category"] or "").strip() == (row["final_category"] or "").strip()
+            )
+            accuracy = round(matched / total_rows, 4) if total_rows > 0 else 0
+            
+            # 4. Deactivate previous commits for same client+bank+period
+            conn.execute(text("""
+                UPDATE commits
+                SET is_active = FALSE
                 WHERE client_id = :cid AND bank_id = :bid AND period = :p AND is_active = TRUE
-            """, {"cid": client_id, "bid": bank_id, "p": period})
-        except:
-            pass  # Ignore if error
-        
-        # 5. Create new commit record
-        commit_result = _q("""
-            INSERT INTO commits (client_id, bank_id, period, committed_by, rows_committed, accuracy, is_active)
-            VALUES (:cid, :bid, :p, :cb, :rows, :acc, TRUE)
-            RETURNING id
-        """, {
-            "cid": client_id, 
-            "bid": bank_id, 
-            "p": period, 
-            "cb": committed_by or "Accountant",
-            "rows": total_rows, 
-            "acc": accuracy
-        })
-        
-        if not commit_result:
-            return {"ok": False, "msg": "Failed to create commit record"}
-        
-        commit_id = commit_result[0]["id"]
-        
-        # 6. Prepare bulk insert for transactions_committed
-        insert_values = []
-        vendor_learning = []
-        keyword_learning = []
-        
-        for row in draft_rows:
-            # Prepare transaction data
-            insert_values.append({
-                "commit_id": commit_id,
-                "client_id": client_id,
-                "bank_id": bank_id,
-                "period": period,
-                "tx_date": row["tx_date"],
-                "description": row["description"],
-                "debit": row.get("debit", 0) or 0,
-                "credit": row.get("credit", 0) or 0,
-                "balance": row.get("balance"),
-                "category": row.get("final_category", ""),
-                "vendor": row.get("final_vendor"),
-                "suggested_category": row.get("suggested_category"),
-                "suggested_vendor": row.get("suggested_vendor"),
-                "confidence": row.get("confidence"),
-                "reason": row.get("reason")
-            })
+            """), params)
             
-            # Collect vendor learning data
-            vendor = row.get("final_vendor")
-            category = row.get("final_category", "")
-            if vendor and category:
-                vendor_learning.append({
-                    "client_id": client_id,
-                    "vendor": vendor,
-                    "category": category
-                })
+            # 5. Create new commit record
+            commit_id = conn.execute(text("""
+                INSERT INTO commits (client_id, bank_id, period, committed_by, rows_committed, accuracy, is_active)
+                VALUES (:cid, :bid, :p, :cb, :rows, :acc, TRUE)
+                RETURNING id
+            """), {**params, "cb": committed_by or "Accountant", "rows": total_rows, "acc": accuracy}).scalar_one()
             
-            # Collect keyword learning data
-            desc = row.get("description") or ""
-            toks = _tokenize(desc)
-            for t in set(toks[:3]):  # Limit to 3 tokens
-                if t and category:
-                    keyword_learning.append({
-                        "client_id": client_id,
-                        "token": t,
-                        "category": category
-                    })
-        
-        # 7. Bulk insert committed transactions (FASTER)
-        inserted_count = 0
-        if insert_values:
-            # Use batch insert
-            for value in insert_values:
-                try:
-                    _exec("""
-                        INSERT INTO transactions_committed (
-                            commit_id, client_id, bank_id, period,
-                            tx_date, description, debit, credit, balance,
-                            category, vendor,
-                            suggested_category, suggested_vendor, confidence, reason
-                        ) VALUES (
-                            :cm, :cid, :bid, :p,
-                            :dt, :ds, :dr, :cr, :bal,
-                            :cat, :ven,
-                            :sc, :sv, :cf, :rs
-                        )
-                    """, {
-                        "cm": value["commit_id"],
-                        "cid": value["client_id"],
-                        "bid": value["bank_id"],
-                        "p": value["period"],
-                        "dt": value["tx_date"],
-                        "ds": value["description"],
-                        "dr": value["debit"],
-                        "cr": value["credit"],
-                        "bal": value["balance"],
-                        "cat": value["category"],
-                        "ven": value["vendor"],
-                        "sc": value["suggested_category"],
-                        "sv": value["suggested_vendor"],
-                        "cf": value["confidence"],
-                        "rs": value["reason"]
-                    })
-                    inserted_count += 1
-                except Exception as e:
-                    continue
-        
-        # 8. Apply learning (AFTER successful insert)
-        # Vendor learning
-        for item in vendor_learning:
-            try:
-                _upsert_vendor_memory(
-                    item["client_id"], 
-                    item["vendor"], 
-                    item["category"], 
-                    delta_conf=0.02
-                )
-            except:
-                pass
-        
-        # Keyword learning
-        for item in keyword_learning:
-            try:
-                _upsert_keyword_weight(
-                    item["client_id"], 
-                    item["token"], 
-                    item["category"], 
-                    delta=0.10
+            # 6. Copy the draft rows server-side
+            inserted_count = conn.execute(text("""
+                INSERT INTO transactions_committed (
+                    commit_id, client_id, bank_id, period,
+                    tx_date, description, debit, credit, balance,
+                    category, vendor,
+                    suggested_category, suggested_vendor, confidence, reason
                 )
-            except:
-                pass
-        
-        # 9. Delete draft rows after successful commit
-        try:
-            delete_draft_period(client_id, bank_id, period)
-        except:
-            pass
+                SELECT :cm, client_id, bank_id, period,
+                       tx_date, description, COALESCE(debit, 0), COALESCE(credit, 0), balance,
+                       final_category, final_vendor,
+                       suggested_category, suggested_vendor, confidence, reason
+                FROM transactions_draft
+                WHERE client_id=:cid AND bank_id=:bid AND period=:p
+                ORDER BY tx_date ASC, id ASC
+            """), {**params, "cm": commit_id}).rowcount
+            
+            # 7. Apply learning, aggregated so each key is upserted once
+            vendor_hits: Dict[str, List[Any]] = {}
+            keyword_hits: Dict[Tuple[str, str], int] = {}
+            for row in draft_rows:
+                category = row["final_category"]
+                vendor_key = _normalize_vendor_key(row["final_vendor"])
+                if vendor_key and category:
+                    hit = vendor_hits.setdefault(vendor_key, [category, 0])
+                    hit[0] = category
+                    hit[1] += 1
+                for t in set(_tokenize(row["description"])[:3]):  # Limit to 3 tokens
+                    if category:
+                        keyword_hits[(t, category)] = keyword_hits.get((t, category), 0) + 1
+            
+            if vendor_hits:
+                conn.execute(text("""
+                    INSERT INTO vendor_memory(client_id, vendor_key, category, confidence, times_confirmed, last_seen)
+                    VALUES (:cid, :v, :c, LEAST(0.9999, 0.70 + :dc * (:n - 1)), :n, now())
+                    ON CONFLICT (client_id, vendor_key)
+                    DO UPDATE SET
+                        category = EXCLUDED.category,
+                        times_confirmed = vendor_memory.times_confirmed + EXCLUDED.times_confirmed,
+                        confidence = LEAST(0.9999, vendor_memory.confidence + :dc * EXCLUDED.times_confirmed),
+                        last_seen = now();
+                """), [
+                    {"cid": client_id, "v": v, "c": c, "n": n, "dc": 0.02}
+                    for v, (c, n) in vendor_hits.items()
+                ])
+            
+            if keyword_hits:
+                conn.execute(text("""
+                    INSERT INTO keyword_model(client_id, token, category, weight, times_used, updated_at)
+                    VALUES (:cid, :t, :c, :w, :n, now())
+                    ON CONFLICT (client_id, token, category)
+                    DO UPDATE SET
+                        weight = keyword_model.weight + EXCLUDED.weight,
+                        times_used = keyword_model.times_used + EXCLUDED.times_used,
+                        updated_at = now();
+                """), [
+                    {"cid": client_id, "t": t, "c": c, "w": 0.10 * n, "n": n}
+                    for (t, c), n in keyword_hits.items()
+                ])
+            
+            # 8. Delete draft rows in the same transaction
+            conn.execute(text("""
+                DELETE FROM transactions_draft
+                WHERE client_id=:cid AND bank_id=:bid AND period=:p;
+            """), params)
         
         return {
             "ok": True, 
@@ -667,13 +803,13 @@ def list_committed_periods(client_id: int, bank_id: Optional[int] = None) -> Lis
     return [r["period"] for r in rows]
 
 
-def list_committed_transactions(
+def _committed_transactions_query(
     client_id: int,
-    bank_id: Optional[int] = None,
-    date_from: Optional[str] = None,
-    date_to: Optional[str] = None,
-    period: Optional[str] = None,
-) -> List[dict]:
+    bank_id: Optional[int],
+    date_from: Optional[str],
+    date_to: Optional[str],
+    period: Optional[str],
+) -> Tuple[str, Dict[str, Any]]:
     conditions = ["tc.client_id=:cid", "c.is_active=TRUE"]
     params: Dict[str, Any] = {"cid": client_id}
     if bank_id is not None:
@@ -699,7 +835,29 @@ def list_committed_transactions(
         WHERE {" AND ".join(conditions)}
         ORDER BY tc.tx_date ASC, tc.id ASC;
     """
-    return _q(sql, params)
+    return sql, params
+
+
+def list_committed_transactions(
+    client_id: int,
+    bank_id: Optional[int] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    period: Optional[str] = None,
+) -> List[dict]:
+    return _q(*_committed_transactions_query(client_id, bank_id, date_from, date_to, period))
+
+
+def list_committed_transactions_df(
+    client_id: int,
+    bank_id: Optional[int] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    period: Optional[str] = None,
+) -> pd.DataFrame:
+    """Committed transactions as a frame with float64 amounts"""
+    sql, params = _committed_transactions_query(client_id, bank_id, date_from, date_to, period)
+    return _q_df(sql, params, dtype={"debit": "float64", "credit": "float64", "balance": "float64"})
 
 
 def list_committed_pl_summary(
@@ -748,6 +906,7 @@ def list_commit_metrics(
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
     period: Optional[str] = None,
+    limit: Optional[int] = None,
 ) -> List[dict]:
     conditions = ["c.client_id=:cid", "c.is_active=TRUE"]
     params: Dict[str, Any] = {"cid": client_id}
@@ -763,6 +922,10 @@ def list_commit_metrics(
     if date_to is not None:
         conditions.append("c.created_at::date <= :dto")
         params["dto"] = date_to
+    limit_sql = ""
+    if limit is not None:
+        limit_sql = "LIMIT :lim"
+        params["lim"] = limit
 
     sql = f"""
         SELECT c.id AS commit_id,
@@ -775,12 +938,27 @@ def list_commit_metrics(
         FROM commits c
         JOIN banks b ON b.id = c.bank_id
         WHERE {" AND ".join(conditions)}
-        ORDER BY c.created_at DESC, c.id DESC;
+        ORDER BY c.created_at DESC, c.id DESC
+        {limit_sql};
     """
     return _q(sql, params)
 
 
 # ---------------- Data Cleanup ----------------
+def _delete_client_rows(conn, table: str, client_id: int, batch_size: int) -> int:
+    """Delete a client's rows from table in id-bounded batches; returns rows deleted"""
+    stmt = text(
+        f"DELETE FROM {table} WHERE id IN "
+        f"(SELECT id FROM {table} WHERE client_id=:cid LIMIT :n)"
+    )
+    total = 0
+    while True:
+        n = conn.execute(stmt, {"cid": client_id, "n": batch_size}).rowcount
+        total += n
+        if n < batch_size:
+            return total
+
+
 def delete_client_data(
     client_id: int,
     delete_banks: bool = False,
@@ -791,60 +969,27 @@ def delete_client_data(
     delete_keyword_model: bool = False,
     delete_commits: bool = False,
     delete_client_itself: bool = False,
+    batch_size: int = 10000,
 ) -> dict:
     deleted_counts = {}
+    batch_size = max(1, int(batch_size))
+    # Dependants before parents: committed rows reference commits
+    tables = (
+        ("keyword_model", delete_keyword_model),
+        ("vendor_memory", delete_vendor_memory),
+        ("transactions_committed", delete_committed),
+        ("transactions_draft", delete_drafts),
+        ("commits", delete_commits),
+        ("categories", delete_categories),
+        ("banks", delete_banks),
+    )
     
     try:
         engine = get_engine()
         with engine.begin() as conn:
-            if delete_keyword_model:
-                result = conn.execute(
-                    text("DELETE FROM keyword_model WHERE client_id=:cid"),
-                    {"cid": client_id}
-                )
-                deleted_counts["keyword_model"] = result.rowcount
-            
-            if delete_vendor_memory:
-                result = conn.execute(
-                    text("DELETE FROM vendor_memory WHERE client_id=:cid"),
-                    {"cid": client_id}
-                )
-                deleted_counts["vendor_memory"] = result.rowcount
-            
-            if delete_committed:
-                result = conn.execute(
-                    text("DELETE FROM transactions_committed WHERE client_id=:cid"),
-                    {"cid": client_id}
-                )
-                deleted_counts["transactions_committed"] = result.rowcount
-            
-            if delete_drafts:
-                result = conn.execute(
-                    text("DELETE FROM transactions_draft WHERE client_id=:cid"),
-                    {"cid": client_id}
-                )
-                deleted_counts["transactions_draft"] = result.rowcount
-            
-            if delete_commits:
-                result = conn.execute(
-                    text("DELETE FROM commits WHERE client_id=:cid"),
-                    {"cid": client_id}
-                )
-                deleted_counts["commits"] = result.rowcount
-            
-            if delete_categories:
-                result = conn.execute(
-                    text("DELETE FROM categories WHERE client_id=:cid"),
-                    {"cid": client_id}
-                )
-                deleted_counts["categories"] = result.rowcount
-            
-            if delete_banks:
-                result = conn.execute(
-                    text("DELETE FROM banks WHERE client_id=:cid"),
-                    {"cid": client_id}
-                )
-                deleted_counts["banks"] = result.rowcount
+            for table, flag in tables:
+                if flag:
+                    deleted_counts[table] = _delete_client_rows(conn, table, client_id, batch_size)
             
             if delete_client_itself:
                 result = conn.execute(
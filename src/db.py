@@ -3,6 +3,7 @@ import os
 from sqlalchemy import create_engine, text
 import streamlit as st
 
+@st.cache_resource
 def get_engine():
     """Get database engine with retry logic"""
     # Try multiple possible secret names
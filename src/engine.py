@@ -1,11 +1,40 @@
 import re
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterable, List, Tuple, Optional
 from datetime import datetime
 
 
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Common prefixes to remove, applied in order
+_VENDOR_PREFIX_RES = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r"^pos\s+purchase\s*",
+    r"^pos\s*",
+    r"^purchase\s*",
+    r"^payment\s+to\s+",
+    r"^payment\s*",
+    r"^paid\s+to\s+",
+    r"^to\s+",
+    r"^from\s+",
+    r"^eft\s+",
+    r"^transfer\s+",
+    r"^trf\s+",
+    r"^card\s+purchase\s*",
+    r"^debit\s+card\s+",
+    r"^credit\s+card\s+",
+))
+
+# Trailing IDs, amounts and reference numbers
+_VENDOR_TAIL_RES = (
+    re.compile(r"\s+\d{4,}.*$"),  # Long IDs
+    re.compile(r"\s+\d+\.\d{2}.*$"),  # Amounts like 123.45
+    re.compile(r"\s+ref\s*.*$", re.IGNORECASE),  # Ref numbers
+    re.compile(r"\s+id\s*.*$", re.IGNORECASE),  # IDs
+)
+
+
 def _normalize_text(s: str) -> str:
     """Normalize text for matching"""
-    return re.sub(r"\s+", " ", (s or "").strip().lower())
+    return _WHITESPACE_RE.sub(" ", (s or "").strip().lower())
 
 
 def _contains_any(desc: str, words: List[str]) -> bool:
@@ -23,34 +52,14 @@ def _extract_vendor(desc: str) -> str:
     if not desc:
         return ""
     
-    # Common prefixes to remove
-    prefixes = [
-        r"^pos\s+purchase\s*",
-        r"^pos\s*",
-        r"^purchase\s*", 
-        r"^payment\s+to\s+",
-        r"^payment\s*",
-        r"^paid\s+to\s+",
-        r"^to\s+",
-        r"^from\s+",
-        r"^eft\s+",
-        r"^transfer\s+",
-        r"^trf\s+",
-        r"^card\s+purchase\s*",
-        r"^debit\s+card\s+",
-        r"^credit\s+card\s+",
-    ]
-    
     # Remove prefixes
     cleaned = desc.lower()
-    for prefix in prefixes:
-        cleaned = re.sub(prefix, "", cleaned, flags=re.IGNORECASE)
+    for prefix_re in _VENDOR_PREFIX_RES:
+        cleaned = prefix_re.sub("", cleaned)
     
     # Remove trailing numbers, IDs, amounts
-    cleaned = re.sub(r"\s+\d{4,}.*$", "", cleaned)  # Long IDs
-    cleaned = re.sub(r"\s+\d+\.\d{2}.*$", "", cleaned)  # Amounts like 123.45
-    cleaned = re.sub(r"\s+ref\s*.*$", "", cleaned, flags=re.IGNORECASE)  # Ref numbers
-    cleaned = re.sub(r"\s+id\s*.*$", "", cleaned, flags=re.IGNORECASE)  # IDs
+    for tail_re in _VENDOR_TAIL_RES:
+        cleaned = tail_re.sub("", cleaned)
     
     # Extract first meaningful chunk (2-4 words)
     words = cleaned.strip().split()
@@ -157,20 +166,67 @@ def _get_account_type_context(bank_account_type: str) -> Dict:
     return context
 
 
-def suggest_one(
-    desc: str,
-    debit: Optional[float],
-    credit: Optional[float],
+# Rule-based keywords (common patterns) per category name
+_RULE_KEYWORDS = {
+    "Bank Charges": ["bank charge", "service fee", "monthly fee", "commission"],
+    "Cash Withdrawal": ["atm", "cash withdrawal", "cashwd"],
+    "Consulting Fee": ["consulting", "advisor", "professional fee"],
+    "Software Subscriptions": ["software", "saas", "subscription", "hosting"],
+    "Office Supplies": ["stationery", "office supplies", "printing"],
+    "Travel Expenses": ["travel", "hotel", "flight", "uber", "transport"],
+    "Meals & Entertainment": ["restaurant", "cafe", "coffee", "food", "dinner"],
+    "Internal Transfer": ["transfer", "eft", "trf", "to savings", "from savings"],
+}
+
+
+def _prepare_context(
     bank_account_type: str,
     categories: List[Dict],
     vendor_memory: List[Dict],
     keyword_weights: List[Dict],
-) -> Tuple[Optional[str], Optional[str], float, str]:
+) -> Dict:
     """
-    Enhanced suggestion engine with multiple factors
+    Normalize the per-client inputs once and group them by category name
+    """
+    vendor_keys: Dict[str, List[str]] = {}
+    for vm in vendor_memory:
+        vm_vendor = _normalize_text(vm.get("vendor_key", ""))
+        if vm_vendor:
+            vendor_keys.setdefault(vm.get("category", ""), []).append(vm_vendor)
+    
+    keyword_tokens: Dict[str, List[Tuple[str, float]]] = {}
+    for kw in keyword_weights or []:
+        token = _normalize_text(kw.get("token", ""))
+        weight = float(kw.get("weight", 0))
+        if token and len(token) >= 3:
+            keyword_tokens.setdefault(kw.get("category", ""), []).append((token, weight))
+    
+    active = [
+        (cat.get("category_name", ""), cat.get("type", "").lower(), cat.get("nature", "Any"))
+        for cat in categories
+        if cat.get("is_active", True)
+    ]
     
-    Returns: (suggested_category_name, suggested_vendor, confidence, reason)
+    return {
+        "categories": categories,
+        "active": active,
+        "vendor_keys": vendor_keys,
+        "keyword_tokens": keyword_tokens,
+        "account_context": _get_account_type_context(bank_account_type),
+    }
+
+
+def _suggest_in_context(
+    desc: str,
+    debit: Optional[float],
+    credit: Optional[float],
+    ctx: Dict,
+) -> Tuple[Optional[str], Optional[str], float, str]:
+    """
+    Score one transaction against a context built by _prepare_context
     """
+    categories = ctx["categories"]
+    account_context = ctx["account_context"]
     
     # Normalize inputs
     desc = (desc or "").strip()
@@ -181,52 +237,32 @@ def suggest_one(
     vendor = _extract_vendor(desc)
     normalized_vendor = _normalize_text(vendor)
     normalized_desc = _normalize_text(desc)
-    
-    # Get account type context
-    account_context = _get_account_type_context(bank_account_type)
+    padded_desc = f" {normalized_desc} "
     
     # Prepare categories with scores
     category_scores = []
     
-    for cat in categories:
-        cat_name = cat.get("category_name", "")
-        cat_type = cat.get("type", "").lower()  # income/expense/other
-        cat_nature = cat.get("nature", "Any")  # Dr/Cr/Any
-        
-        # Skip if not active
-        if not cat.get("is_active", True):
-            continue
-        
+    for cat_name, cat_type, cat_nature in ctx["active"]:
         # Initialize score
         score = 0.0
         reasons = []
         match_type = "none"
         
         # 1. Vendor Memory Match (highest priority)
-        for vm in vendor_memory:
-            vm_vendor = _normalize_text(vm.get("vendor_key", ""))
-            vm_category = vm.get("category", "")
-            
-            if vm_vendor and vm_vendor in normalized_desc and vm_category == cat_name:
+        for vm_vendor in ctx["vendor_keys"].get(cat_name, ()):
+            if vm_vendor in normalized_desc:
                 score += 0.8
                 reasons.append(f"Vendor memory: {vm_vendor}")
                 match_type = "vendor_memory"
                 break
         
         # 2. Keyword Weight Match
-        if match_type == "none" and keyword_weights:
-            for kw in keyword_weights:
-                token = _normalize_text(kw.get("token", ""))
-                kw_category = kw.get("category", "")
-                weight = float(kw.get("weight", 0))
-                
-                if (token and len(token) >= 3 and 
-                    token in normalized_desc and 
-                    kw_category == cat_name):
+        if match_type == "none":
+            for token, weight in ctx["keyword_tokens"].get(cat_name, ()):
+                if token in normalized_desc:
                     score += min(0.6, weight / 10.0)
                     reasons.append(f"Keyword: {token}")
-                    if match_type != "vendor_memory":
-                        match_type = "keyword_match"
+                    match_type = "keyword_match"
         
         # 3. Nature Match Score
         nature_score = _get_category_nature_score(cat_nature, is_debit, is_credit)
@@ -245,23 +281,12 @@ def suggest_one(
             reasons.append("Account type: likely income")
         
         # 5. Rule-based keywords (common patterns)
-        rule_keywords = {
-            "Bank Charges": ["bank charge", "service fee", "monthly fee", "commission"],
-            "Cash Withdrawal": ["atm", "cash withdrawal", "cashwd"],
-            "Consulting Fee": ["consulting", "advisor", "professional fee"],
-            "Software Subscriptions": ["software", "saas", "subscription", "hosting"],
-            "Office Supplies": ["stationery", "office supplies", "printing"],
-            "Travel Expenses": ["travel", "hotel", "flight", "uber", "transport"],
-            "Meals & Entertainment": ["restaurant", "cafe", "coffee", "food", "dinner"],
-            "Internal Transfer": ["transfer", "eft", "trf", "to savings", "from savings"],
-        }
-        
-        for rule_cat, keywords in rule_keywords.items():
-            if cat_name == rule_cat and _contains_any(desc, keywords):
-                score += 0.4
-                reasons.append(f"Rule match: {keywords[0]}")
-                if match_type in ["none", "nature_heuristic"]:
-                    match_type = "rule_match"
+        keywords = _RULE_KEYWORDS.get(cat_name)
+        if keywords and any(f" {w} " in padded_desc for w in keywords):
+            score += 0.4
+            reasons.append(f"Rule match: {keywords[0]}")
+            if match_type in ["none", "nature_heuristic"]:
+                match_type = "rule_match"
         
         # Store category with score and reasons
         if score > 0:
@@ -274,9 +299,6 @@ def suggest_one(
                 "nature": cat_nature
             })
     
-    # Sort categories by score (highest first)
-    category_scores.sort(key=lambda x: x["score"], reverse=True)
-    
     # Select best category
     suggested_category = None
     suggested_vendor = vendor
@@ -284,7 +306,8 @@ def suggest_one(
     reason = "Default fallback"
     
     if category_scores:
-        best = category_scores[0]
+        # Highest score wins; max() keeps the first of any tie, as the stable sort did
+        best = max(category_scores, key=lambda x: x["score"])
         suggested_category = best["category"]
         
         # Calculate confidence
@@ -331,6 +354,38 @@ def suggest_one(
     return suggested_category, suggested_vendor, confidence, reason
 
 
+def suggest_one(
+    desc: str,
+    debit: Optional[float],
+    credit: Optional[float],
+    bank_account_type: str,
+    categories: List[Dict],
+    vendor_memory: List[Dict],
+    keyword_weights: List[Dict],
+) -> Tuple[Optional[str], Optional[str], float, str]:
+    """
+    Enhanced suggestion engine with multiple factors
+    
+    Returns: (suggested_category_name, suggested_vendor, confidence, reason)
+    """
+    ctx = _prepare_context(bank_account_type, categories, vendor_memory, keyword_weights)
+    return _suggest_in_context(desc, debit, credit, ctx)
+
+
+def suggest_batch(
+    rows: Iterable[Tuple[str, Optional[float], Optional[float]]],
+    bank_account_type: str,
+    categories: List[Dict],
+    vendor_memory: List[Dict],
+    keyword_weights: List[Dict],
+) -> List[Tuple[Optional[str], Optional[str], float, str]]:
+    """
+    suggest_one for many (desc, debit, credit) rows, preparing the client context once
+    """
+    ctx = _prepare_context(bank_account_type, categories, vendor_memory, keyword_weights)
+    return [_suggest_in_context(desc, debit, credit, ctx) for desc, debit, credit in rows]
+
+
 # Helper function for crud.py integration
 def get_keyword_weights_for_client(keyword_weights: List[Dict]) -> Dict[str, Tuple[str, float]]:
     """